@@ -0,0 +1,61 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Optimizer cost of the PI tuning in main.py, from the fixed starting point
+versus from the best tuning rule, over the nominal model and variations:
+
+    python benchmark.py
+"""
+
+from itertools import product
+
+import numpy as np
+from scipy.optimize import minimize
+
+from main import MODEL_PARAMS, objective
+from tuning import best_seed
+
+# Former hard-coded starting point of main.py
+X0 = np.array([-12.259, -1.481])
+
+
+def bench_seeding(scales=(0.7, 1.0, 1.3)) -> None:
+    print("Model (Kp, tau, theta)\t\tFixed x0 nit/nfev/RSS\tRule seed nit/nfev/RSS")
+    totals = np.zeros((2, 3))
+    for kp, tau, theta in product(scales, repeat=3):
+        params = (MODEL_PARAMS[0] * kp, MODEL_PARAMS[1] * tau, MODEL_PARAMS[2] * theta)
+        rule, seed, _ = best_seed(lambda x, p=params: objective(x, p), params)
+
+        cells = []
+        for i, x0 in enumerate((X0, seed)):
+            res = minimize(objective, x0, args=(params,))
+            # The rule seed costs one objective call per rule
+            nfev = res.nfev + (4 if i else 0)
+            totals[i] += res.nit, nfev, res.fun
+            cells.append(f"{res.nit:3d}/{nfev:4d}/{res.fun:8.4f}")
+        model = "({:.3f}, {:.2f}, {:.2f})".format(*params)
+        print(f"{model}\t{cells[0]}\t\t{cells[1]} {rule}")
+
+    print(
+        "Total nit/nfev/RSS:\t\t{:.0f}/{:.0f}/{:.2f}\t{:.0f}/{:.0f}/{:.2f}".format(
+            *totals[0], *totals[1]
+        )
+    )
+
+
+if __name__ == "__main__":
+    bench_seeding()
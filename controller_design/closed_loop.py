@@ -0,0 +1,192 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+
+from math import exp
+
+import numpy as np
+
+
+def discretize(tau: float, dead_time: float, dt: float = 1.0) -> tuple:
+    """
+    ## Exact discretization of the FOPDT model under a zero-order-hold MV.
+
+    With `dead_time = (delay + f) * dt`, the MV seen during one sample period
+    switches from `mv[n - delay - 1]` to `mv[n - delay]` after `f * dt`, so
+    `x[n+1] = pole * x[n] + gain * (b1 * mv[n - delay - 1] + b0 * mv[n - delay])`.
+
+    #### Return value:
+    (pole, delay, b0, b1)
+    """
+    delay, frac = divmod(dead_time / dt, 1.0)
+    tail = exp(-(1.0 - frac) * dt / tau)
+    pole = exp(-dt / tau)
+    return pole, int(delay), 1.0 - tail, tail - pole
+
+
+def simulate(
+    sp: np.ndarray,
+    gains: tuple[float, float, float],
+    model_params: tuple[float, float, float],
+    initial_value: float,
+    limits: tuple[float, float] = (0, 5),
+    dt: float = 1.0,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    ## Closed-loop PID + FOPDT simulation in one tight loop.
+
+    The PID is the law of `rpi/controller/pid.py`: derivative on -CV, the
+    integral summed only while the last MV is inside `limits` (or, with
+    Kp = 0, while it moves away from the limit it sits on), the MV held when
+    the error is exactly zero and clamped to `limits`. The FOPDT model sees
+    MV zero before the first sample, with the dead time kept in a ring buffer
+    of past MVs. The last MV repeats the one before it.
+
+    #### Return value:
+    (cv, mv)
+    """
+    kp, ki, kd = gains
+    gain, tau, dead_time = model_params
+    pole, delay, b0, b1 = discretize(tau, dead_time, dt)
+    lower, upper = sorted(limits)
+    low_limit = limits[0]
+
+    n = len(sp)
+    sp = sp.tolist() if isinstance(sp, np.ndarray) else list(sp)
+    cv = [initial_value] * n
+    mv = [0.0] * n
+
+    # MV history seen by the model, mv[i - delay] and mv[i - delay - 1]
+    ring = [0.0] * (delay + 2)
+    size = delay + 2
+
+    i_val = d_val = pre_err = pre_mv = 0.0
+    d_init = False
+    x = 0.0
+    for i in range(n - 1):
+        # PID
+        err = sp[i] - cv[i]
+        if err == 0:
+            out = pre_mv
+        else:
+            p_val = kp * err
+            temp_i = ki * err
+            if lower < pre_mv < upper:
+                i_val += temp_i
+            if kp == 0 and (
+                (pre_mv == lower and temp_i > 0) or (pre_mv == upper and temp_i < 0)
+            ):
+                i_val += temp_i
+            err_d = -cv[i]
+            if d_init:
+                d_val = kd * (err_d - pre_err)
+            else:
+                d_val = 0.0
+                d_init = True
+            pre_err = err_d
+            out = p_val + i_val + d_val + low_limit
+            out = lower if out < lower else (upper if out > upper else out)
+            pre_mv = out
+        mv[i] = out
+
+        # FOPDT
+        ring[i % size] = out
+        x = pole * x + gain * (
+            b0 * ring[(i - delay) % size] * (i >= delay)
+            + b1 * ring[(i - delay - 1) % size] * (i > delay)
+        )
+        cv[i + 1] = initial_value + x
+
+    mv[-1] = mv[-2]
+    return np.array(cv), np.array(mv)
+
+
+def simulate_batch(
+    sp: np.ndarray,
+    gains: np.ndarray,
+    model_params: tuple[float, float, float],
+    initial_value: float,
+    limits: tuple[float, float] = (0, 5),
+    dt: float = 1.0,
+) -> tuple[np.ndarray, np.ndarray, dict[str, np.ndarray]]:
+    """
+    ## Closed-loop simulation of N gain candidates at once.
+
+    Same loop as `simulate`, with the N PID controllers and models advanced
+    together as arrays. `gains` has shape (N, 3) holding (Kp, Ki, Kd).
+
+    #### Return value:
+    (cv, mv, metrics) where cv and mv have shape (N, T) and metrics holds
+    per-candidate `rss`, `iae` and `overshoot` arrays of shape (N,).
+    """
+    gains = np.atleast_2d(np.asarray(gains, dtype=float))
+    kp, ki, kd = gains.T
+    gain, tau, dead_time = model_params
+    pole, delay, b0, b1 = discretize(tau, dead_time, dt)
+    lower, upper = sorted(limits)
+    low_limit = limits[0]
+
+    sp = np.asarray(sp, dtype=float)
+    n_cand, n = len(gains), len(sp)
+    cv = np.full((n_cand, n), float(initial_value))
+    mv = np.zeros((n_cand, n))
+
+    # MV history seen by the models, one row per delay slot
+    size = delay + 2
+    ring = np.zeros((size, n_cand))
+
+    p_val, i_val, d_val = np.zeros(n_cand), np.zeros(n_cand), np.zeros(n_cand)
+    pre_err, pre_mv = np.zeros(n_cand), np.zeros(n_cand)
+    d_init = np.zeros(n_cand, dtype=bool)
+    kp_zero = kp == 0
+    x = np.zeros(n_cand)
+    for i in range(n - 1):
+        # PID
+        err = sp[i] - cv[:, i]
+        active = err != 0
+        p_val = np.where(active, kp * err, p_val)
+        temp_i = ki * err
+        windup_free = (lower < pre_mv) & (pre_mv < upper)
+        unwind = kp_zero & (
+            ((pre_mv == lower) & (temp_i > 0)) | ((pre_mv == upper) & (temp_i < 0))
+        )
+        i_val += np.where(active & (windup_free | unwind), temp_i, 0.0)
+        err_d = -cv[:, i]
+        d_val = np.where(active, np.where(d_init, kd * (err_d - pre_err), 0.0), d_val)
+        d_init |= active
+        pre_err = np.where(active, err_d, pre_err)
+        out = np.clip(p_val + i_val + d_val + low_limit, lower, upper)
+        pre_mv = np.where(active, out, pre_mv)
+        mv[:, i] = pre_mv
+
+        # FOPDT
+        ring[i % size] = pre_mv
+        x *= pole
+        if i >= delay:
+            x += gain * b0 * ring[(i - delay) % size]
+        if i > delay:
+            x += gain * b1 * ring[(i - delay - 1) % size]
+        cv[:, i + 1] = initial_value + x
+
+    mv[:, -1] = mv[:, -2]
+
+    err = cv - sp
+    direction = np.sign(sp[-1] - sp[0])
+    metrics = {
+        "rss": np.sum(err**2, axis=1),
+        "iae": np.sum(np.abs(err), axis=1) * dt,
+        "overshoot": np.maximum(np.max(direction * err, axis=1), 0.0),
+    }
+    return cv, mv, metrics
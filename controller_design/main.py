@@ -14,90 +14,139 @@
 # PRPCE. If not, see <https://www.gnu.org/licenses/>.
 
 
+import json
+from argparse import ArgumentParser
+from pathlib import Path
+
 import matplotlib.pyplot as plt
 import numpy as np
+from pandas import read_csv
 from scipy.optimize import minimize
 
-from fopdt import FOPDT
-from pid import PID
+from closed_loop import simulate, simulate_batch
+from tuning import best_seed
 
 t = np.arange(start=0, stop=200)
 
+# Model Kp, tau, theta
+MODEL_PARAMS = (-0.347, 14.716, 3.866)
+
+# Scale factors of the --sweep grid of K_P, K_I around the optimum
+SWEEP = np.linspace(0.25, 2.0, 36)
+
+
+def load_model(file: str) -> tuple[float, float, float]:
+    """
+    ## Kp, tau, theta of the first row of a `fit_model/batch.py` summary.
+
+    The summary is read as JSON for a `.json` suffix and as CSV otherwise,
+    as `batch.write_summary` writes it.
+    """
+    if Path(file).suffix.lower() == ".json":
+        with open(file, encoding="utf-8") as jsonfile:
+            row = json.load(jsonfile)[0]
+    else:
+        row = read_csv(file).iloc[0]
+    return float(row["Kp"]), float(row["tau"]), float(row["theta"])
+
 
-def refresh(x):
+def refresh(x, model_params=None):
     initial_value = 5.2
     starting_time = 10
 
     # Model param
-    _gain, _tau, _dead_time = -0.347, 14.716, 3.866
+    _gain, _tau, _dead_time = MODEL_PARAMS if model_params is None else model_params
     _kp, _ki = x
     _kd = 0
 
-    # Data array init
-    sp = np.zeros(len(t))
-    cv = np.zeros(len(t))
-    mv = np.zeros(len(t))
-    p_val = np.zeros(len(t))
-    i_val = np.zeros(len(t))
-    d_val = np.zeros(len(t))
-
-    # PID
-    pid = PID()
-    pid.gain_adjustment = (_kp, _ki, _kd)
-
-    # FOPDT model
-    model = FOPDT(mv)
-    model.model_params = (_gain, _tau, _dead_time, initial_value)
-
-    # Initial value of CV
-    cv[0] = initial_value
-
-    for i in t:
-        if i < len(t) - 1:
-            if i < starting_time:
-                sp[i] = initial_value
-            else:
-                sp[i] = 4.3
-
-            # calculate MV
-            mv[i] = pid(sp[i], cv[i])
-            model.mv = mv
-
-            # calculate CV
-            cv[i + 1] = model(cv[i], [t[i], t[i + 1]])
-
-            p_val[i], i_val[i], d_val[i] = pid.element_value
-        else:
-            # Remove endpoint
-            sp[i] = sp[i - 1]
-            mv[i] = mv[i - 1]
-            p_val[i] = p_val[i - 1]
-            i_val[i] = i_val[i - 1]
-            d_val[i] = d_val[i - 1]
+    # SP step at starting_time
+    sp = np.where(t < starting_time, initial_value, 4.3)
+
+    # Closed-loop PID + FOPDT
+    cv, mv = simulate(sp, (_kp, _ki, _kd), (_gain, _tau, _dead_time), initial_value)
     return sp, cv, mv
 
 
+# refresh for an (N, 2) array of K_P, K_I candidates at once
+def refresh_batch(xs, model_params=None):
+    initial_value = 5.2
+    starting_time = 10
+    _gain, _tau, _dead_time = MODEL_PARAMS if model_params is None else model_params
+
+    gains = np.zeros((len(xs), 3))
+    gains[:, :2] = xs
+    sp = np.where(t < starting_time, initial_value, 4.3)
+    cv, mv, metrics = simulate_batch(
+        sp, gains, (_gain, _tau, _dead_time), initial_value
+    )
+    return sp, cv, mv, metrics
+
+
+def sweep(x, model_params=None):
+    """
+    ## RSS, IAE and overshoot over the (K_P, K_I) grid `SWEEP * x`, simulated at once.
+
+    #### Return value:
+    (kp, ki, metrics) with the grid axes and each metric of shape (len(ki), len(kp))
+    """
+    kp, ki = x[0] * SWEEP, x[1] * SWEEP
+    grid_kp, grid_ki = np.meshgrid(kp, ki)
+    xs = np.column_stack([grid_kp.ravel(), grid_ki.ravel()])
+    _, _, _, metrics = refresh_batch(xs, model_params)
+    shape = grid_kp.shape
+    return kp, ki, {name: value.reshape(shape) for name, value in metrics.items()}
+
+
+def plot_sweep(x, model_params=None) -> None:
+    kp, ki, metrics = sweep(x, model_params)
+    _, axes = plt.subplots(1, len(metrics), figsize=(5 * len(metrics), 4))
+    for ax, (name, value) in zip(axes, metrics.items(), strict=True):
+        mesh = ax.pcolormesh(kp, ki, value, shading="auto")
+        plt.colorbar(mesh, ax=ax)
+        ax.plot(x[0], x[1], "r+", markersize=12, label="Optimum")
+        ax.set_title(name.upper() if name != "overshoot" else "Overshoot")
+        ax.set_xlabel("Kp")
+        ax.set_ylabel("Ki")
+    axes[0].legend(loc="upper right")
+    plt.tight_layout()
+
+
 # define objective function (RSS)
-def objective(x):
-    sp, cv, _ = refresh(x)
-    obj = 0.0
-    for i in range(len(cv)):
-        obj += (cv[i] - sp[i]) ** 2
-    return obj
+def objective(x, model_params=None):
+    sp, cv, _ = refresh(x, model_params)
+    return np.sum((cv - sp) ** 2)
 
 
 if __name__ == "__main__":
-    # initial of K_P, K_I
-    x0 = np.array([-12.259, -1.481])
+    parser = ArgumentParser(description="Optimize PI gains for the FOPDT model.")
+    parser.add_argument(
+        "summary",
+        nargs="?",
+        help="fit_model/batch.py summary .csv or .json (default: MODEL_PARAMS)",
+    )
+    parser.add_argument(
+        "--sweep",
+        action="store_true",
+        help="also plot RSS, IAE and overshoot over a (Kp, Ki) grid around the optimum",
+    )
+    args = parser.parse_args()
+    if args.summary is not None:
+        MODEL_PARAMS = load_model(args.summary)
+
+    # initial of K_P, K_I from the best tuning rule
+    rule, x0, rss0 = best_seed(objective, MODEL_PARAMS)
 
     # show initial objective
-    print(f"Initial RSS:\t{objective(x0):.5f}")
+    print(f"Seed:\t\t{rule}")
+    print(f"Initial RSS:\t{rss0:.5f}")
 
     # optimize K_P, K_I
-    sol = minimize(objective, x0).x
+    res = minimize(objective, x0)
+    sol = res.x
 
     # show final objective
     print(f"Final RSS:\t{objective(sol):.5f}")
+    print(f"Iterations:\t{res.nit}")
     print(f"Kp:\t{sol[0]:.3f}")
     print(f"Ki:\t{sol[1]:.3f}")
 
@@ -116,4 +165,7 @@ if __name__ == "__main__":
     # plt.plot(t, mv, color="green", linewidth=1.5, label="MV")
     plt.title(f"Kp:{sol[0]:.3f}     Ki:{sol[1]:.3f}")
     plt.legend(loc="upper right")
+
+    if args.sweep:
+        plot_sweep(sol)
     plt.show()
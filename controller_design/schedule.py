@@ -0,0 +1,95 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Tune PI gains at several operating points for gain scheduling in rpi.
+
+    python schedule.py models.csv --output result/gain_schedule.csv
+
+`models.csv` holds one FOPDT model per operating point, with the columns
+"Pressure", "Gain", "Tau", "Theta" (e.g. `fit_model` results of step tests
+run around each pressure). The output table, "Pressure", "Kp", "Ki", "Kd", is
+read by `rpi/controller/schedule.py`.
+"""
+
+from argparse import ArgumentParser
+
+import numpy as np
+from pandas import DataFrame, read_csv
+from scipy.optimize import minimize
+
+from closed_loop import simulate, simulate_batch
+from tuning import best_seed
+
+HEADER = ["Pressure", "Kp", "Ki", "Kd"]
+
+# Same test as main.refresh: SP steps by STEP into the operating point at 10 s
+STEP = 0.9
+STARTING_TIME = 10
+t = np.arange(start=0, stop=200)
+
+# Scale factors of the seeding grid around the best tuning rule
+GRID = np.linspace(0.25, 2.0, 15)
+
+
+def tune(point: float, model_params: tuple[float, float, float]) -> tuple:
+    """
+    ## PI gains minimising the RSS of an SP step into `point`.
+
+    A grid around the best tuning rule (see `tuning.best_seed`) is simulated
+    at once with `simulate_batch` to seed the local optimisation.
+
+    #### Return value:
+    (Kp, Ki, Kd)
+    """
+    initial_value = point + STEP
+    sp = np.where(t < STARTING_TIME, initial_value, point)
+
+    def objective(x):
+        cv, _ = simulate(sp, (*x, 0), model_params, initial_value)
+        return np.sum((cv - sp) ** 2)
+
+    _, x0, _ = best_seed(objective, model_params)
+    kp, ki = np.meshgrid(x0[0] * GRID, x0[1] * GRID)
+    candidates = np.column_stack([kp.ravel(), ki.ravel(), np.zeros(kp.size)])
+    _, _, metrics = simulate_batch(sp, candidates, model_params, initial_value)
+    seed = candidates[np.argmin(metrics["rss"]), :2]
+
+    sol = minimize(objective, seed).x
+    return float(sol[0]), float(sol[1]), 0.0
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = ArgumentParser(
+        description="Tune a PI gain schedule over operating points."
+    )
+    parser.add_argument("models", help="CSV of Pressure, Gain, Tau, Theta per point")
+    parser.add_argument("--output", default="./result/gain_schedule.csv")
+    args = parser.parse_args(argv)
+
+    models = read_csv(args.models)
+    rows = []
+    for point, gain, tau, theta in models[["Pressure", "Gain", "Tau", "Theta"]].values:
+        rows.append([point, *tune(point, (gain, tau, theta))])
+        print("Pressure {:.2f}:\tKp {:.3f}\tKi {:.3f}\tKd {:.3f}".format(*rows[-1]))
+
+    DataFrame(rows, columns=HEADER).to_csv(
+        args.output, index=False, float_format="%.3f"
+    )
+
+
+if __name__ == "__main__":
+    main()
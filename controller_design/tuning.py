@@ -0,0 +1,123 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Classic tuning rules for the FOPDT model, in the gains used by `closed_loop`.
+
+Every rule gives the controller gain Kc and the integral / derivative times
+tau_I, tau_D, which the PID of `closed_loop` (integral summed once per
+sample) takes as
+Kp = Kc, Ki = Kc * dt / tau_I and Kd = Kc * tau_D / dt.
+"""
+
+from collections.abc import Callable
+
+import numpy as np
+
+
+def _gains(kc: float, tau_i: float, tau_d: float, dt: float) -> tuple:
+    return kc, kc * dt / tau_i, kc * tau_d / dt if tau_d else 0.0
+
+
+def cohen_coon(gain, tau, dead_time, mode="PI", dt=1.0) -> tuple:
+    """
+    ## Cohen-Coon, as in `Cohen-Coon.xlsx`.
+    """
+    ratio = dead_time / (dead_time + tau)
+    a = gain * dead_time / tau
+    if mode == "PID":
+        kc = 1.35 / a * (1 + 0.18 * ratio / (1 - ratio))
+        tau_i = (2.5 - 2 * ratio) / (1 - 0.39 * ratio) * dead_time
+        tau_d = (0.37 - 0.37 * ratio) / (1 - 0.81 * ratio) * dead_time
+        return _gains(kc, tau_i, tau_d, dt)
+    kc = 0.9 / a * (1 + 0.92 * ratio / (1 - ratio))
+    tau_i = (3.3 - 3 * ratio) / (1 + 1.2 * ratio) * dead_time
+    return _gains(kc, tau_i, 0.0, dt)
+
+
+def ziegler_nichols(gain, tau, dead_time, mode="PI", dt=1.0) -> tuple:
+    """
+    ## Ziegler-Nichols open-loop (reaction curve) rule.
+    """
+    if mode == "PID":
+        return _gains(
+            1.2 * tau / (gain * dead_time), 2 * dead_time, 0.5 * dead_time, dt
+        )
+    return _gains(0.9 * tau / (gain * dead_time), 3.33 * dead_time, 0.0, dt)
+
+
+def imc(gain, tau, dead_time, mode="PI", dt=1.0, tau_c=None) -> tuple:
+    """
+    ## IMC rule, with the closed-loop time constant `tau_c` defaulting to the dead time.
+    """
+    tau_c = dead_time if tau_c is None else tau_c
+    if mode == "PID":
+        kc = (tau + dead_time / 2) / (gain * (tau_c + dead_time / 2))
+        tau_d = tau * dead_time / (2 * tau + dead_time)
+        return _gains(kc, tau + dead_time / 2, tau_d, dt)
+    return _gains(tau / (gain * (tau_c + dead_time)), tau, 0.0, dt)
+
+
+def amigo(gain, tau, dead_time, mode="PI", dt=1.0) -> tuple:
+    """
+    ## AMIGO rule of Astrom and Hagglund.
+    """
+    if mode == "PID":
+        kc = (0.2 + 0.45 * tau / dead_time) / gain
+        tau_i = (0.4 * dead_time + 0.8 * tau) / (dead_time + 0.1 * tau) * dead_time
+        tau_d = 0.5 * dead_time * tau / (0.3 * dead_time + tau)
+        return _gains(kc, tau_i, tau_d, dt)
+    kc = (
+        0.15 + (0.35 - dead_time * tau / (dead_time + tau) ** 2) * tau / dead_time
+    ) / gain
+    tau_i = 0.35 * dead_time + 13 * dead_time * tau**2 / (
+        tau**2 + 12 * dead_time * tau + 7 * dead_time**2
+    )
+    return _gains(kc, tau_i, 0.0, dt)
+
+
+RULES: dict[str, Callable] = {
+    "Cohen-Coon": cohen_coon,
+    "Ziegler-Nichols": ziegler_nichols,
+    "IMC": imc,
+    "AMIGO": amigo,
+}
+
+
+def rule_gains(model_params: tuple[float, float, float], mode: str = "PI") -> dict:
+    """
+    ## (Kp, Ki, Kd) of every rule for the FOPDT `model_params` (gain, tau, theta).
+    """
+    return {name: rule(*model_params, mode=mode) for name, rule in RULES.items()}
+
+
+def best_seed(objective: Callable, model_params: tuple, mode: str = "PI") -> tuple:
+    """
+    ## The rule whose gains give the lowest `objective`.
+
+    `objective` takes (Kp, Ki) for "PI" and (Kp, Ki, Kd) for "PID", as passed
+    to `minimize`.
+
+    #### Return value:
+    (rule name, gains as np.ndarray, objective value)
+    """
+    size = 3 if mode == "PID" else 2
+    scores = [
+        (objective(np.array(gains[:size])), name, np.array(gains[:size]))
+        for name, gains in rule_gains(model_params, mode).items()
+    ]
+    value, name, x0 = min(scores, key=lambda score: score[0])
+    return name, x0, value
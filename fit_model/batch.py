@@ -0,0 +1,111 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Fit every step-test CSV matched by the given globs, headless.
+
+    python batch.py "data/*.csv" --summary result/summary.csv --plot
+"""
+
+import json
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from glob import glob
+from pathlib import Path
+from time import perf_counter
+
+from pandas import DataFrame
+
+from fit import X0, StepTest, multistart, plot_name, save_plot
+
+COLUMNS = ["file", "Kp", "tau", "theta", "RSS", "fit time", "iterations"]
+
+
+def fit_file(
+    file: str, plot_dir: str | None = None, starts: int = 1, workers: int | None = 1
+) -> dict:
+    test = StepTest.from_csv(file)
+
+    start = perf_counter()
+    res = test.fit(X0) if starts <= 1 else multistart(test, starts, workers=workers)
+    elapsed = perf_counter() - start
+
+    if plot_dir is not None:
+        save_plot(
+            test, res.x, str(Path(plot_dir) / f"{Path(file).stem}_{plot_name(res.x)}")
+        )
+
+    return dict(
+        zip(
+            COLUMNS,
+            [file, *map(float, res.x), float(res.fun), elapsed, int(res.nit)],
+            strict=True,
+        )
+    )
+
+
+def write_summary(rows: list[dict], file: str) -> None:
+    if Path(file).suffix.lower() == ".json":
+        with open(file, mode="w", encoding="utf-8") as jsonfile:
+            json.dump(rows, jsonfile, indent=2)
+    else:
+        DataFrame(rows, columns=COLUMNS).to_csv(file, index=False, float_format="%.5f")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = ArgumentParser(description="Batch FOPDT identification of step tests.")
+    parser.add_argument("patterns", nargs="+", help="glob(s) of CSV files")
+    parser.add_argument(
+        "--summary", default="./result/summary.csv", help="output .csv or .json"
+    )
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes")
+    parser.add_argument(
+        "--plot", action="store_true", help="save a PNG per file under result/"
+    )
+    parser.add_argument(
+        "--starts", type=int, default=1, help="multi-start local fits per file"
+    )
+    args = parser.parse_args(argv)
+
+    files = sorted({f for pattern in args.patterns for f in glob(pattern)})
+    if not files:
+        parser.error("no CSV file matches the given pattern(s)")
+
+    plot_dir = str(Path(args.summary).parent) if args.plot else None
+    Path(args.summary).parent.mkdir(parents=True, exist_ok=True)
+
+    if len(files) == 1:
+        # A single file spends the workers on its multi-start runs instead
+        rows = [fit_file(files[0], plot_dir, args.starts, args.jobs)]
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            rows = list(
+                pool.map(
+                    partial(fit_file, plot_dir=plot_dir, starts=args.starts), files
+                )
+            )
+
+    write_summary(rows, args.summary)
+    for row in rows:
+        print(
+            f"{row['file']}:\tKp {row['Kp']:.3f}\ttau {row['tau']:.3f}"
+            f"\ttheta {row['theta']:.3f}\tRSS {row['RSS']:.5f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
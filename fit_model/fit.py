@@ -0,0 +1,163 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+from pandas import read_csv
+from scipy.optimize import OptimizeResult, minimize
+from scipy.stats import qmc
+
+from fopdt import simulate, simulate_sensitivity
+
+# Default initial guess of k, tau, theta
+X0 = (-1.0, 10.0, 1.0)
+
+# Box of k, tau, theta sampled for multi-start initial guesses
+START_BOUNDS = ((-2.0, 2.0), (1.0, 60.0), (0.0, 15.0))
+
+# Physical limits of k, tau, theta kept by the multi-start local fits
+FIT_BOUNDS = ((None, None), (1e-3, None), (0.0, None))
+
+
+class StepTest:
+    """
+    ## Step-test record and the FOPDT fitting problem built on it.
+    """
+
+    def __init__(self, t: np.ndarray, u: np.ndarray, yp: np.ndarray) -> None:
+        self.t = np.asarray(t, dtype=float) - t[0]
+        self.u = np.asarray(u, dtype=float)
+        self.yp = np.asarray(yp, dtype=float)
+        self.u0 = self.u[0]
+        self.yp0 = self.yp[0]
+
+        # Samples are treated as uniformly spaced by the mean sample time. On
+        # data/multi_step_change.csv (sample times 1.00 - 1.02 s, up to 0.27 s
+        # off the uniform grid) the model then differs from odeint on the real
+        # sample times by 1.9e-3 bar at the fit (-0.347, 14.72, 3.865), 1.0e-2
+        # bar at (-0.3, 2, 7.99) and at worst 0.12 bar over a grid of
+        # START_BOUNDS, reached at (2, 1, 15): the faster and stronger the
+        # model, the more the timing offset shows
+        self.ns = len(self.t)
+        self.delta_t = (self.t[-1] - self.t[0]) / (self.ns - 1)
+
+    @classmethod
+    def from_csv(cls, file: str) -> "StepTest":
+        """
+        ## Load a record written by `rpi/prbs.py`.
+        """
+        data = read_csv(file)
+        return cls(
+            data["Time consuming"].values,
+            data["Valve opening"].values,
+            data["Pressure"].values,
+        )
+
+    # simulate FOPDT model with x=[k,tau,theta]
+    def sim_model(self, x) -> np.ndarray:
+        k, tau, theta = x
+        return simulate(self.u, self.delta_t, k, tau, theta, self.u0, self.yp0)
+
+    # define objective function (RSS)
+    def objective(self, x) -> float:
+        return np.sum((self.sim_model(x) - self.yp) ** 2)
+
+    # RSS together with its exact gradient d(RSS)/d(k, tau, theta)
+    def objective_grad(self, x) -> tuple[float, np.ndarray]:
+        y_model, sens = simulate_sensitivity(
+            self.u, self.delta_t, *x, self.u0, self.yp0
+        )
+        res = y_model - self.yp
+        return np.sum(res**2), 2.0 * (res @ sens)
+
+    def fit(self, x0=X0, bounds=None) -> OptimizeResult:
+        """
+        ## Optimize k, tau, theta from the initial guess `x0`.
+        """
+        return minimize(
+            self.objective_grad, np.asarray(x0, dtype=float), jac=True, bounds=bounds
+        )
+
+
+def multistart(
+    test: StepTest,
+    n_starts: int = 32,
+    bounds=START_BOUNDS,
+    workers: int | None = None,
+    seed: int | None = 0,
+) -> OptimizeResult:
+    """
+    ## Run local fits from a Latin-hypercube of initial guesses.
+
+    The starts are independent, so they are spread over `workers` processes
+    (`None` uses every core, `1` runs in the calling process).
+
+    #### Return value:
+    OptimizeResult of the best fit, with extra fields
+    - `starts`, `optima`, `rss`: initial guess, local optimum and RSS of each run
+    - `spread`: standard deviation of the converged local optima
+    """
+    lower, upper = np.array(bounds, dtype=float).T
+    starts = qmc.scale(
+        qmc.LatinHypercube(d=3, seed=seed).random(n_starts), lower, upper
+    )
+
+    local_fit = partial(test.fit, bounds=FIT_BOUNDS)
+    if workers == 1:
+        results = list(map(local_fit, starts))
+    else:
+        chunksize = max(1, n_starts // (4 * (workers or os.cpu_count() or 1)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(local_fit, starts, chunksize=chunksize))
+
+    rss = np.array([res.fun for res in results])
+    best = results[int(np.nanargmin(rss))]
+    optima = np.array([res.x for res in results])
+    converged = np.array([res.success for res in results])
+
+    best.starts = starts
+    best.optima = optima
+    best.rss = rss
+    best.spread = optima[converged].std(axis=0) if converged.any() else None
+    return best
+
+
+def plot_name(sol) -> str:
+    """
+    ## File name of a fit plot, e.g. `Kp-0.347_tau14.720_theta3.865.png`.
+    """
+    return f"Kp{sol[0]:.3f}_tau{sol[1]:.3f}_theta{sol[2]:.3f}.png"
+
+
+def save_plot(test: StepTest, sol, file: str) -> None:
+    """
+    ## Save the process data against the fitted model without a GUI backend.
+    """
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    ax = fig.add_subplot(2, 1, 1)
+    ax.plot(test.t, test.yp, "b-", linewidth=3, label="Process Data")
+    ax.plot(test.t, test.sim_model(sol), "r--", linewidth=2, label="Optimized FOPDT")
+    ax.set_ylabel("Preassure (bar)")
+    ax = fig.add_subplot(2, 1, 2)
+    ax.plot(test.t, test.u, "b-", linewidth=3, label="Measured")
+    ax.set_ylabel("Valve Opening (%)")
+    ax.set_xlabel("Time (s)")
+    fig.savefig(file)
@@ -0,0 +1,177 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+
+import numpy as np
+from scipy.signal import lfilter
+
+from input_signal import InputSignal
+
+
+def _segment(length: float, tau: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Exact response of dx/dt = (-x + v) / tau over a segment in which v moves
+    # linearly from va to vb:  x(L) = e * x(0) + alpha * va + beta * vb
+    # Returns [e, alpha, beta] and their partial derivatives by L and by tau.
+    if length <= 0:
+        half = 0.5 / tau
+        return np.array([1.0, 0.0, 0.0]), np.array([-2 * half, half, half]), np.zeros(3)
+    e = np.exp(-length / tau)
+    r = -np.expm1(-length / tau) * tau / length
+
+    de_dl, de_dtau = -e / tau, e * length / tau**2
+    dr_dl, dr_dtau = (e - r) / length, (1.0 - e) / length - e / tau
+    return (
+        np.array([e, r - e, 1.0 - r]),
+        np.array([de_dl, dr_dl - de_dl, -dr_dl]),
+        np.array([de_dtau, dr_dtau - de_dtau, -dr_dtau]),
+    )
+
+
+def _taps(frac: float, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    # Combine the two segments of one sample period into the input taps
+    (_, alpha1, beta1), (e2, alpha2, beta2) = first, second
+    return np.array(
+        [
+            beta2 * (1.0 - frac),
+            e2 * alpha1 * (1.0 - frac) + e2 * beta1 + alpha2 + beta2 * frac,
+            e2 * alpha1 * frac,
+        ]
+    )
+
+
+def _taps_derivative(
+    frac: float,
+    first: np.ndarray,
+    second: np.ndarray,
+    d_first: np.ndarray,
+    d_second: np.ndarray,
+    d_frac: float,
+) -> np.ndarray:
+    # Directional derivative of `_taps` (product rule)
+    (_, alpha1, beta1), (e2, _, beta2) = first, second
+    (_, d_alpha1, d_beta1), (d_e2, d_alpha2, d_beta2) = d_first, d_second
+    d_e2_alpha1 = d_e2 * alpha1 + e2 * d_alpha1
+    return np.array(
+        [
+            d_beta2 * (1.0 - frac) - beta2 * d_frac,
+            d_e2_alpha1 * (1.0 - frac)
+            - e2 * alpha1 * d_frac
+            + d_e2 * beta1
+            + e2 * d_beta1
+            + d_alpha2
+            + d_beta2 * frac
+            + beta2 * d_frac,
+            d_e2_alpha1 * frac + e2 * alpha1 * d_frac,
+        ]
+    )
+
+
+def discretize(dt: float, tau: float, theta: float) -> tuple[float, int, np.ndarray]:
+    """
+    ## Exact discretization of a first-order system with fractional dead time.
+
+    The input is assumed to be linearly interpolated between samples (the same
+    as `interp1d(t, u)`), and is delayed by `theta = (delay + f) * dt`. Negative
+    dead time is treated as zero.
+
+    #### Return value:
+    (pole, delay, [c0, c1, c2]) such that
+    `x[n] = pole * x[n-1] + c0 * w[n-delay] + c1 * w[n-delay-1] + c2 * w[n-delay-2]`
+    """
+    pole, delay, taps, _ = discretize_sensitivity(dt, tau, theta)
+    return pole, delay, taps
+
+
+def discretize_sensitivity(
+    dt: float, tau: float, theta: float
+) -> tuple[float, int, np.ndarray, np.ndarray]:
+    """
+    ## Same as `discretize`, plus the derivatives of the coefficients.
+
+    #### Return value:
+    (pole, delay, taps, jac) where `jac` is a (2, 4) array holding
+    d[pole, c0, c1, c2] / d(tau, theta).
+    """
+    delay, frac = divmod(max(theta, 0.0) / dt, 1.0)
+    first, first_dl, first_dtau = _segment(frac * dt, tau)
+    second, second_dl, second_dtau = _segment((1.0 - frac) * dt, tau)
+    taps = _taps(frac, first, second)
+    pole = first[0] * second[0]
+
+    dtaps_dtau = _taps_derivative(frac, first, second, first_dtau, second_dtau, 0.0)
+    dtaps_dfrac = _taps_derivative(
+        frac, first, second, first_dl * dt, -second_dl * dt, 1.0
+    )
+
+    jac = np.zeros((2, 4))
+    jac[0, 0] = dt / tau**2 * pole
+    jac[0, 1:] = dtaps_dtau
+    jac[1, 1:] = dtaps_dfrac / dt if theta >= 0 else 0.0
+    return pole, int(delay), taps, jac
+
+
+def _delayed_input(u: np.ndarray, u0: float, delay: int) -> np.ndarray:
+    # Rows hold w[n-delay], w[n-delay-1], w[n-delay-2] for n = 1 .. len(u) - 1,
+    # clamped to the first/last sample
+    w = InputSignal(np.asarray(u, dtype=float) - u0)
+    idx = np.arange(1, len(w)) - delay
+    return w.take(np.stack([idx, idx - 1, idx - 2]))
+
+
+def simulate(
+    u: np.ndarray, dt: float, k: float, tau: float, theta: float, u0: float, y0: float
+) -> np.ndarray:
+    """
+    ## Simulate the FOPDT model over a uniformly sampled input.
+
+    `u[0]` is held for all time before the first sample and the output starts
+    at `y0`. On a uniform grid the result equals the `odeint` solution of
+    `dy/dt = (-(y - y0) + k * (u(t - theta) - u0)) / tau` to within the ODE
+    solver tolerance (~1e-6).
+
+    #### Return value:
+    np.ndarray with the same length as `u`
+    """
+    pole, delay, taps = discretize(dt, tau, theta)
+    z = np.zeros(len(u))
+    z[1:] = k * (taps @ _delayed_input(u, u0, delay))
+    return y0 + lfilter([1.0], [1.0, -pole], z)
+
+
+def simulate_sensitivity(
+    u: np.ndarray, dt: float, k: float, tau: float, theta: float, u0: float, y0: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    ## Simulate the FOPDT model together with its parameter sensitivities.
+
+    The sensitivities are the exact derivatives of the discrete recurrence used
+    by `simulate`, propagated through the same filter.
+
+    #### Return value:
+    (y, dy) where `dy` has shape (len(u), 3) and holds dy/d(k, tau, theta)
+    """
+    pole, delay, taps, jac = discretize_sensitivity(dt, tau, theta)
+    w = _delayed_input(u, u0, delay)
+    n = len(u)
+
+    forcing = np.zeros((4, n))
+    forcing[0, 1:] = taps @ w
+    forcing[2:, 1:] = k * (jac[:, 1:] @ w)
+    x = lfilter([1.0], [1.0, -pole], k * forcing[0])
+
+    # d(pole)/d(tau) feeds back the previous state
+    forcing[2, 1:] += jac[0, 0] * x[:-1]
+    sens = lfilter([1.0], [1.0, -pole], forcing[[0, 2, 3]], axis=1)
+    return y0 + x, sens.T
@@ -0,0 +1,82 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+
+import numpy as np
+
+
+class InputSignal:
+    """
+    ## Input sampled on a uniform grid `t = n * dt`, n = 0 .. len(values) - 1.
+
+    Lookups are plain index arithmetic. Times before the first sample return
+    `before`, times past the last sample return `after`; both default to the
+    first / last sample. `values` is kept by reference, so in-place updates of
+    a float array are seen by later lookups.
+    """
+
+    def __init__(
+        self,
+        values,
+        dt: float = 1.0,
+        before: float | None = None,
+        after: float | None = None,
+    ) -> None:
+        self.values = np.asarray(values, dtype=float)
+        self.dt = dt
+        self.before = before
+        self.after = after
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __edges(self) -> tuple[float, float]:
+        before = self.values[0] if self.before is None else self.before
+        after = self.values[-1] if self.after is None else self.after
+        return before, after
+
+    def __call__(self, t: float) -> float:
+        """
+        ## Zero-order-hold value at time `t`.
+        """
+        if t < 0:
+            return self.values[0] if self.before is None else self.before
+        index = int(t / self.dt)
+        if index >= len(self.values):
+            return self.values[-1] if self.after is None else self.after
+        return self.values[index]
+
+    def take(self, index: np.ndarray) -> np.ndarray:
+        """
+        ## Samples at integer `index`, with out-of-range indices mapped to the edges.
+        """
+        index = np.asarray(index)
+        before, after = self.__edges()
+        inside = self.values[np.clip(index, 0, len(self.values) - 1)]
+        return np.where(index < 0, before, np.where(index >= len(self), after, inside))
+
+    def sample(self, t: np.ndarray) -> np.ndarray:
+        """
+        ## Zero-order-hold values over a whole time vector.
+        """
+        return self.take(np.floor(np.asarray(t) / self.dt).astype(int))
+
+    def interp(self, t: np.ndarray) -> np.ndarray:
+        """
+        ## Linearly interpolated values over a whole time vector.
+        """
+        before, after = self.__edges()
+        grid = np.arange(len(self.values)) * self.dt
+        return np.interp(t, grid, self.values, left=before, right=after)
@@ -0,0 +1,292 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Microbenchmarks of the per-sample work done inside the control loop.
+Runs without the AD/DA board (the loop benchmark uses `utils.simulated`):
+
+    python benchmark.py
+"""
+
+from timeit import Timer
+
+import numpy as np
+
+from controller.pid import PID, LeanPID
+from controller.predictive import MPC, SmithPredictor
+from controller.schedule import GainSchedule, ScheduledPID
+from model.fopdt import FOPDT, FOPDTPredictor
+from model.identification import RLSIdentifier
+from utils.backend import Backend
+from utils.convert import Converter
+
+PID_GAIN = (-10.941, -1.351, 0)
+SET_POINT = 4.2
+
+# Model Kp, tau, theta
+MODEL_PARAMS = (-0.347, 14.720, 3.865)
+
+
+def per_call(stmt: str, number: int, repeat: int = 5, **env) -> float:
+    """
+    ## Best-of-`repeat` time of `stmt` divided by `number`, in microseconds.
+    """
+    timer = Timer(stmt, globals=env)
+    return min(timer.repeat(repeat=repeat, number=1)) / number * 1e6
+
+
+def bench_pid() -> None:
+    rng = np.random.default_rng(0)
+    cv = (SET_POINT + rng.normal(0, 0.3, 20000)).tolist()
+
+    # Loop overhead alone, subtracted from the per-call figures
+    empty = per_call("for pv in cv: pass", len(cv), cv=cv)
+
+    for cls in (PID, LeanPID):
+        controller = cls(6, 9)
+        controller.gain_adjustment = PID_GAIN
+        latency = per_call(
+            "for pv in cv: step(sp, pv)", len(cv), cv=cv, step=controller, sp=SET_POINT
+        )
+        print(f"{cls.__name__}.__call__:\t{latency - empty:.3f} us")
+
+    controller = LeanPID(6, 9)
+    controller.gain_adjustment = PID_GAIN
+    latency = per_call(
+        "step_many(sp, cv)", len(cv), cv=cv, step_many=controller.step_many, sp=SET_POINT
+    )
+    print(f"LeanPID.step_many:\t{latency:.3f} us per sample")
+
+
+def bench_predictor(steps: int = 120) -> None:
+    mv = np.random.default_rng(0).integers(-3, 4, steps).astype(float)
+    t = np.arange(steps)
+
+    # The per-step integration formerly done in control.py
+    model = FOPDT(mv)
+    model.model_params = (*MODEL_PARAMS, 5.0)
+    latency = per_call(
+        "for i in range(n): model(5.0, [t[i], t[i + 1]])",
+        steps - 1,
+        repeat=3,
+        model=model,
+        t=t,
+        n=steps - 1,
+    )
+    print(f"FOPDT.__call__ per step:\t{latency:.3f} us")
+
+    predictor = FOPDTPredictor((*MODEL_PARAMS, 5.0))
+    latency = per_call("for u in mv: push(u)", steps, mv=mv.tolist(), push=predictor.push)
+    print(f"FOPDTPredictor.push:\t{latency:.3f} us")
+
+    latency = per_call("forecast(0.0, 30)", 1, forecast=predictor.forecast)
+    print(f"FOPDTPredictor.forecast(30):\t{latency:.3f} us")
+
+    cv = [predictor.push(u) for u in mv.tolist()]
+    latency = per_call(
+        "for pv, u in data: update(pv, u)",
+        steps,
+        data=list(zip(cv, mv.tolist(), strict=True)),
+        update=RLSIdentifier().update,
+    )
+    print(f"RLSIdentifier.update (9 delays):\t{latency:.3f} us")
+
+
+def bench_controllers(period: float = 1.0) -> None:
+    """
+    ## Per-step solve latency of each controller mode against the sample period.
+    """
+    rng = np.random.default_rng(0)
+    cv = (SET_POINT + rng.normal(0, 0.3, 5000)).tolist()
+
+    def pid() -> LeanPID:
+        # A fresh controller per mode, so no mode runs on another's state
+        controller = LeanPID(6, 9)
+        controller.gain_adjustment = PID_GAIN
+        return controller
+
+    schedule = GainSchedule(
+        [3.8, 4.2, 4.6], [(-8.0, -1.0, 0), (-10.941, -1.351, 0), (-12.0, -1.6, 0)]
+    )
+    modes = {
+        "LeanPID": pid(),
+        "ScheduledPID": ScheduledPID(pid(), schedule),
+        "SmithPredictor": SmithPredictor(pid(), MODEL_PARAMS, mv_offset=6),
+        "MPC(horizon=30)": MPC(MODEL_PARAMS, (6, 9)),
+        "MPC(horizon=120)": MPC(MODEL_PARAMS, (6, 9), horizon=120, control_horizon=10),
+    }
+    for name, controller in modes.items():
+        latency = per_call(
+            "for pv in cv: step(sp, pv)", len(cv), cv=cv, step=controller, sp=SET_POINT
+        )
+        print(f"{name}:\t{latency:.3f} us, {latency * 1e-6 / period:.2e} of the period")
+
+
+class HostClock(Backend):
+    """
+    ## The host clock with the default `Backend.delay_ns`, and no GPIO or SPI.
+    """
+
+    def setup(self, pin: int, direction: str, pull_up: bool = False) -> None:
+        raise RuntimeError("HostClock has no GPIO")
+
+    def output(self, pin: int, level: int) -> None:
+        raise RuntimeError("HostClock has no GPIO")
+
+    def input(self, pin: int) -> int:
+        raise RuntimeError("HostClock has no GPIO")
+
+    def wait_for_falling_edge(self, pin: int, timeout_ms: int) -> None:
+        raise RuntimeError("HostClock has no GPIO")
+
+    def spi_xfer(self, data: list[int], delay_usecs: int = 0, speed_hz: int = 0) -> list[int]:
+        raise RuntimeError("HostClock has no SPI")
+
+
+def bench_delays(repeat: int = 200) -> None:
+    """
+    ## Requested versus measured `utils.timing` waits on this machine's clock.
+    """
+    from utils import timing
+    from utils.wrapper import set_backend
+
+    set_backend(HostClock())
+    for microsecond in (1, 4, 7, 10, 100, 1000, 5000):
+        for _ in range(repeat):
+            timing.wait_us(microsecond, f"{microsecond} us")
+    print(timing.report())
+    timing.timings.clear()
+
+
+def legacy_sample(adc_spi, dac_spi, mux: int, code: int) -> list[int]:
+    """
+    ## The SPI sequence of one loop sample before the transport layer.
+
+    As the former `ADS1256.get_channel_value` and `DAC8532.output_volt` did it:
+    one CS cycle per command, and RDATA written, waited for and read back as
+    separate calls.
+    """
+    from utils.adc import (
+        CMD_RDATA,
+        CMD_SYNC,
+        CMD_WAKEUP,
+        CMD_WREG,
+        DIN_DOUT_US,
+        REG_MUX,
+        SYNC_WAKEUP_US,
+    )
+    from utils.timing import wait_us
+
+    adc_spi.write([CMD_WREG | REG_MUX, 0x00, mux])
+    adc_spi.write([CMD_SYNC])
+    wait_us(SYNC_WAKEUP_US)
+    adc_spi.write([CMD_WAKEUP])
+    with adc_spi.transaction():
+        adc_spi.xfer([CMD_RDATA])
+        wait_us(DIN_DOUT_US)
+        data = adc_spi.xfer([0xFF, 0xFF, 0xFF])
+    dac_spi.write([0x30, code >> 8, code & 0xFF])
+    return data
+
+
+def bench_spi(samples: int = 1000) -> None:
+    """
+    ## SPI traffic of one loop sample (ADC read + DAC write), in simulated bus time.
+
+    The former per-command sequence and the combined transactions are both run
+    at the former 20 kHz bus clock, then the transactions at the per-device
+    clocks, so the saving of each change shows on its own. The simulated bus
+    time only counts clocked bytes and held delays; what fewer CS cycles and
+    transfers save (GPIO writes and ioctl calls) shows in their counts.
+    """
+    from utils.adc import ADS1256
+    from utils.dac import DAC8532
+    from utils.simulated import SimulatedPlant
+    from utils.wrapper import (
+        AD_CS_PIN,
+        AD_SPI_HZ,
+        DA_CS_PIN,
+        DA_SPI_HZ,
+        SPIDevice,
+        set_backend,
+    )
+
+    for name, ad_hz, da_hz, legacy in (
+        ("Former commands at 20 kHz", 20_000, 20_000, True),
+        ("Transactions at 20 kHz", 20_000, 20_000, False),
+        ("Transactions at device clocks", AD_SPI_HZ, DA_SPI_HZ, False),
+    ):
+        set_backend(SimulatedPlant(seed=0))
+        adc, dac = ADS1256(spi_hz=ad_hz), DAC8532(spi_hz=da_hz)
+        ad_spi, da_spi = adc.spi, dac.spi
+        if legacy:
+            ad_spi, da_spi = SPIDevice(AD_CS_PIN, ad_hz), SPIDevice(DA_CS_PIN, da_hz)
+        ad_spi.reset_stats()
+        for _ in range(samples):
+            if legacy:
+                legacy_sample(ad_spi, da_spi, 0x08, 0x6300)
+            else:
+                adc.get_channel_value(0)
+                dac.output_volt(2.0, force=True)
+
+        ad, da = ad_spi.stats, da_spi.stats
+        print(
+            f"{name}:\t{(ad['transactions'] + da['transactions']) / samples:.0f} "
+            f"transactions, {(ad['transfers'] + da['transfers']) / samples:.0f} "
+            f"transfers, {(ad['bytes'] + da['bytes']) / samples:.0f} bytes, "
+            f"{(ad['time'] + da['time']) / samples * 1e6:.1f} us per sample"
+        )
+
+
+def bench_loop(duration: int = 3600) -> None:
+    """
+    ## The full ADC -> PID -> DAC loop of `control.py` on the simulated plant.
+    """
+    from time import perf_counter
+
+    from utils.adc import ADS1256
+    from utils.dac import DAC8532
+    from utils.scheduler import PeriodicScheduler
+    from utils.simulated import SimulatedPlant
+    from utils.wrapper import now_ns, pause, set_backend
+
+    set_backend(SimulatedPlant(noise=0.02, seed=0))
+    adc, dac = ADS1256(), DAC8532()
+    dig2p = Converter(output_type="Pressure")
+    valve2volt = Converter(input_type="Valve", output_type="Voltage")
+    controller = LeanPID(6, 9)
+    controller.gain_adjustment = PID_GAIN
+
+    scheduler = PeriodicScheduler(1, now_ns, pause)
+    start = perf_counter()
+    for _ in range(duration):
+        pressure = dig2p(adc.get_channel_value(0))
+        dac.output_volt(valve2volt(round(controller(SET_POINT, pressure), 1)))
+        scheduler.wait()
+    wall = perf_counter() - start
+    print(
+        f"Simulated loop:\t{wall / duration * 1e6:.1f} us per sample, "
+        f"{duration / wall:.0f}x real time, final pressure {pressure:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    bench_pid()
+    bench_predictor()
+    bench_controllers()
+    bench_delays()
+    bench_spi()
+    bench_loop()
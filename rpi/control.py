@@ -14,34 +14,57 @@
 # PRPCE. If not, see <https://www.gnu.org/licenses/>.
 
 
-from csv import writer as write
-from time import sleep, time
-
-import numpy as np
-
-from controller.pid import PID
-from model.fopdt import FOPDT
+from itertools import count
+from math import nan
+
+from controller.pid import LeanPID
+from controller.predictive import MPC, SmithPredictor
+from controller.schedule import GainSchedule, ScheduledPID
+from model.fopdt import FOPDTPredictor
+from model.identification import RLSIdentifier
 from utils.adc import ADS1256
 from utils.convert import Converter
 from utils.dac import DAC8532
-from utils.wrapper import cleanup, termination
+from utils.logger import DataLogger
+from utils.scheduler import PeriodicScheduler
+from utils.telemetry import FIELDS, Telemetry
+from utils.timing import report as delay_report
+from utils.wrapper import cleanup, now_ns, pause, termination
+
+# "pid", "smith" (Smith predictor around the PID) or "mpc"
+CONTROL_MODE = "pid"
 
 PID_GAIN = (-10.941, -1.351, 0)
+# PI of the delay-free model inside the Smith predictor: controller_design/main.py
+# `objective` minimized for the model (-0.347, 14.716, 0.0), seeded with
+# tuning.py `imc(..., tau_c=3.0)`. On the simulated plant the IAE over the run
+# is 19.32, against 19.83 for PID_GAIN in "pid" mode
+SMITH_GAIN = (-14.839, -5.031, 0)
+
+# Gain table from controller_design/schedule.py, scheduled on the pressure
+# ("pid" mode only); None keeps PID_GAIN
+GAIN_SCHEDULE = None
 SET_POINT = 4.2
 
 # Model Kp, tau, theta
 MODEL_PARAMS = (-0.347, 14.720, 3.865)
 
+# None runs until interrupted, in constant memory
 STOP_TIME = 120
 TIME_PER_STEP = 1
 
+# Samples kept in memory, each with the `utils.telemetry.FIELDS` of one log row
+TELEMETRY_SAMPLES = 3600
+
+logger = None
+telemetry = None
 try:
     # AD/DA Init
     ADC = ADS1256()
     DAC = DAC8532()
     DAC.output_volt(0.0)
     DAC.output_volt(0.0, DAC.CH_B)
-    sleep(5)
+    pause(5)
 
     # Converter Init
     dig2p = Converter(output_type="Pressure")
@@ -51,48 +74,85 @@ try:
     digital_val = ADC.get_channel_value(0)
     initial_value = dig2p(digital_val)
 
-    # PID Init
-    controller = PID(6, 9)
-    # PID Tunning Gain
-    controller.gain_adjustment = PID_GAIN
+    # Controller Init
+    match CONTROL_MODE:
+        case "smith":
+            pid = LeanPID(6, 9)
+            pid.gain_adjustment = SMITH_GAIN
+            controller = SmithPredictor(pid, MODEL_PARAMS, TIME_PER_STEP, mv_offset=6)
+        case "mpc":
+            controller = MPC(MODEL_PARAMS, (6, 9), dt=TIME_PER_STEP)
+        case _:
+            controller = LeanPID(6, 9)
+            # PID Tunning Gain
+            controller.gain_adjustment = PID_GAIN
+            if GAIN_SCHEDULE is not None:
+                schedule = GainSchedule.from_csv(GAIN_SCHEDULE)
+                controller = ScheduledPID(controller, schedule)
 
     # FOPDT Model Init
-    t = np.arange(start=0, stop=int(STOP_TIME / TIME_PER_STEP))
-    mv = np.zeros(len(t))
-    cv = np.array([initial_value] + [0] * (len(t) - 1))
-    model = FOPDT(mv)
-    model.model_params = (*MODEL_PARAMS, initial_value)
+    model = FOPDTPredictor((*MODEL_PARAMS, initial_value), TIME_PER_STEP)
+    prediction = initial_value
 
-    file = "./control_result/pid_control.csv"
-    with open(file, mode="w", encoding="utf-8", newline="") as csvfile:
-        writer = write(csvfile)
-        writer.writerow(["Time consuming", "Valve opening", "Pressure", "Model Predict"])
+    # On-line identification of (Kp, tau, theta)
+    identifier = RLSIdentifier(dt=TIME_PER_STEP)
 
-    start_time = time()
-    for i in t:
+    file = "./control_result/pid_control.csv"
+    logger = DataLogger(
+        file,
+        [
+            "Time consuming",
+            "Valve opening",
+            "Pressure",
+            "Model Predict",
+            "Kp",
+            "tau",
+            "theta",
+            "Set point",
+            "P",
+            "I",
+            "D",
+        ],
+        [".2f", "", ".1f", ".1f", ".3f", ".3f", ".3f", ".2f", ".3f", ".3f", ".3f"],
+        clock=now_ns,
+    )
+    telemetry = Telemetry(FIELDS, TELEMETRY_SAMPLES)
+
+    scheduler = PeriodicScheduler(TIME_PER_STEP, now_ns, pause)
+    steps = count() if STOP_TIME is None else range(int(STOP_TIME / TIME_PER_STEP))
+    for _ in steps:
         digital_val = ADC.get_channel_value(0)
         pressure = dig2p(digital_val)
         valve_opening = round(controller(SET_POINT, pressure), 1)
         DAC.output_volt(valve2volt(valve_opening))
 
+        estimate = identifier.update(pressure, valve_opening)
+        terms = getattr(controller, "element_value", (nan, nan, nan))
+        telemetry.append(
+            scheduler.elapsed(),
+            valve_opening,
+            pressure,
+            prediction,
+            *estimate,
+            SET_POINT,
+            *terms,
+        )
+
+        # The logger takes the new records as one view per flush interval
+        if telemetry.pending * TIME_PER_STEP >= logger.flush_interval:
+            logger.log_many(telemetry.drain())
+
         # Predict Model
-        if i < len(t) - 1:
-            mv[i] = int(valve_opening) - 6
-            model.mv = mv
-            cv[i + 1] = model(cv[i], [t[i], t[i + 1]])
-
-        with open(file, mode="a", encoding="utf-8", newline="") as csvfile:
-            writer = write(csvfile)
-            now = time() - start_time
-            writer.writerow(
-                [
-                    f"{now:.2f}",
-                    f"{valve_opening}",
-                    f"{pressure:.1f}",
-                    f"{cv[i]:.1f}",
-                ]
-            )
-        sleep(TIME_PER_STEP)
+        prediction = model.push(int(valve_opening) - 6)
+        scheduler.wait()
+
+    recent = telemetry.window()
+    iae = abs(recent["pv"] - recent["sp"]).sum() * TIME_PER_STEP
+    print(scheduler.report())
+    print(f"IAE over the last {len(recent)} samples: {iae:.2f}")
+    print(delay_report())
+    print(f"DAC writes skipped: {DAC.skipped_writes}")
+    print("Identified Kp {:.3f}, tau {:.3f}, theta {:.3f}".format(*identifier.estimate))
 
 
 except KeyboardInterrupt:
@@ -100,6 +160,10 @@ except KeyboardInterrupt:
 except Exception as err:
     termination(err)
 finally:
+    if logger is not None:
+        if telemetry is not None:
+            logger.log_many(telemetry.drain())
+        logger.close()
     DAC.output_volt(0.0)
     DAC.output_volt(0.0, DAC.CH_B)
     cleanup()
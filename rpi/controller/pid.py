@@ -16,6 +16,8 @@
 
 from types import MappingProxyType
 
+import numpy as np
+
 
 class PID:
     def __init__(self, min_val: int = 0, max_val: int = 100) -> None:
@@ -60,6 +62,21 @@ class PID:
         """
         self.__kp, self.__ki, self.__kd = value
 
+    def retune(self, value: tuple[float, float, float]) -> None:
+        """
+        ## Change Kp, Ki, and Kd without a bump in MV.
+
+        The P and D terms of the last call are rescaled to the new gains and
+        the integral absorbs the difference, so the same error gives the same
+        MV as before the change.
+        """
+        kp, ki, kd = value
+        p_val = self.__p_val * kp / self.__kp if self.__kp else 0
+        d_val = self.__d_val * kd / self.__kd if self.__kd else 0
+        self.__i_val += self.__p_val - p_val + self.__d_val - d_val
+        self.__p_val, self.__d_val = p_val, d_val
+        self.__kp, self.__ki, self.__kd = value
+
     def __confine(self, value: float, limits: tuple) -> float:
         lower, upper = limits
         if value is None:
@@ -116,4 +133,137 @@ class PID:
         self.__pre_mv = 0
 
 
+class LeanPID:
+    """
+    ## Same control law as `PID`, laid out for the sampling loop.
+
+    Limits are plain floats sorted once at construction, the state lives in
+    `__slots__`, and `step_many` replays whole SP/CV sequences.
+    """
+
+    __slots__ = (
+        "_kp",
+        "_ki",
+        "_kd",
+        "_min",
+        "_max",
+        "_lower",
+        "_upper",
+        "_p_val",
+        "_i_val",
+        "_d_val",
+        "_pre_err",
+        "_pre_mv",
+        "_d_init",
+    )
+
+    def __init__(self, min_val: int = 0, max_val: int = 100) -> None:
+        # kp , ki, kd value
+        self._kp, self._ki, self._kd = 0, 0, 0
+
+        # PID output limit, as given and sorted for clamping
+        self._min, self._max = min_val, max_val
+        self._lower, self._upper = sorted((min_val, max_val))
+
+        # P, I, D value
+        self._p_val = 0
+        self._i_val = 0
+        self._d_val = 0
+
+        # Previous error (In order to calculate D value)
+        self._pre_err = 0
+        self._pre_mv = 0
+
+        # Verify that D is initialized before each call to the new PID
+        self._d_init = False
+
+    # Get element value
+    @property
+    def element_value(self) -> tuple[float, float, float]:
+        """
+        ## Get Values of Proportional, Integral, and Derivative.
+
+        #### Return value:
+        (float, float, float)
+        """
+        return self._p_val, self._i_val, self._d_val
+
+    # Adjust the value of Kp, Ki, and Kd
+    @property
+    def gain_adjustment(self) -> tuple[float, float, float]:
+        return self._kp, self._ki, self._kd
+
+    @gain_adjustment.setter
+    def gain_adjustment(self, value: tuple[float, float, float]) -> None:
+        """
+        Setting Kp, Ki, and Kd.
+        """
+        self._kp, self._ki, self._kd = value
+
+    def retune(self, value: tuple[float, float, float]) -> None:
+        """
+        ## Change Kp, Ki, and Kd without a bump in MV, as `PID.retune`.
+        """
+        kp, ki, kd = value
+        p_val = self._p_val * kp / self._kp if self._kp else 0
+        d_val = self._d_val * kd / self._kd if self._kd else 0
+        self._i_val += self._p_val - p_val + self._d_val - d_val
+        self._p_val, self._d_val = p_val, d_val
+        self._kp, self._ki, self._kd = value
+
+    def __call__(self, SP, CV) -> float:
+        err = SP - CV
+        # Avoid outputting 0 when error is 0
+        if err == 0:
+            return self._pre_mv
+
+        # P
+        p_val = self._p_val = self._kp * err
+
+        # I
+        if self._min < self._pre_mv < self._max:
+            self._i_val += self._ki * err
+
+        # D
+        # In order not to oscillate when SP changes, use CV instead.
+        errD = -CV
+        if self._d_init:
+            self._d_val = self._kd * (errD - self._pre_err)
+        else:
+            self._d_val = 0
+            self._d_init = True
+        self._pre_err = errD
+
+        # Manipulated variable(MV)
+        mv = p_val + self._i_val + self._d_val + self._min
+        lower, upper = self._lower, self._upper
+        mv = lower if mv < lower else (upper if mv > upper else mv)
+        self._pre_mv = mv
+        return mv
+
+    def step_many(self, sp_array, cv_array) -> np.ndarray:
+        """
+        ## Feed a whole SP/CV sequence through the controller.
+
+        #### Return value:
+        np.ndarray of MV, one per sample
+        """
+        step = self.__call__
+        cv_array = np.asarray(cv_array, dtype=float)
+        sp_list = np.broadcast_to(sp_array, cv_array.shape).tolist()
+        return np.array(
+            [step(sp, cv) for sp, cv in zip(sp_list, cv_array.tolist(), strict=True)]
+        )
+
+    def reset(self) -> None:
+        """
+        ## Reset the PID controller internals.
+        """
+        self._p_val = 0
+        self._i_val = min(max(0, self._lower), self._upper)
+        self._d_val = 0
+        self._pre_err = 0
+        self._pre_mv = 0
+
+
 ##########      EOF     ##########
@@ -0,0 +1,135 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+
+import numpy as np
+
+from model.fopdt import FOPDTPredictor
+
+
+class SmithPredictor:
+    """
+    ## Dead-time compensation around an existing PID.
+
+    Two copies of the FOPDT model run on the applied MV, one with and one
+    without the dead time. The PID sees the measured CV plus their difference,
+    i.e. the CV the process would have without dead time, so it can be tuned
+    for the time constant alone. Call it like `PID`: `controller(SP, CV) -> MV`.
+
+    `mv_offset` is the MV the model deviation refers to (the valve opening of
+    the steady state the run starts from).
+    """
+
+    def __init__(
+        self,
+        controller,
+        model_params: tuple[float, float, float],
+        dt: float = 1.0,
+        mv_offset: float = 0.0,
+    ) -> None:
+        gain, tau, dead_time = model_params
+        self.controller = controller
+        self.mv_offset = mv_offset
+        self.__delayed = FOPDTPredictor((gain, tau, dead_time, 0.0), dt)
+        self.__undelayed = FOPDTPredictor((gain, tau, 0.0, 0.0), dt)
+
+    @property
+    def feedback(self) -> float:
+        """
+        ## Correction added to the measured CV before it reaches the PID.
+        """
+        return self.__undelayed.cv - self.__delayed.cv
+
+    @property
+    def element_value(self) -> tuple[float, float, float]:
+        return self.controller.element_value
+
+    def __call__(self, SP, CV) -> float:
+        mv = self.controller(SP, CV + self.feedback)
+        self.__delayed.push(mv - self.mv_offset)
+        self.__undelayed.push(mv - self.mv_offset)
+        return mv
+
+    def reset(self) -> None:
+        """
+        ## Reset the PID and both models.
+        """
+        self.controller.reset()
+        self.__delayed.reset()
+        self.__undelayed.reset()
+
+
+class MPC:
+    """
+    ## Receding-horizon controller on the FOPDT step response (DMC).
+
+    Every sample the free response over `horizon` periods is predicted from
+    the internal model, shifted by the current model error (a constant output
+    disturbance, which makes the control offset-free), and the
+    `control_horizon` MV moves minimising
+
+        sum((SP - CV)^2) + move_weight * sum(dMV^2)
+
+    are solved in closed form. The least-squares gain is precomputed, so a
+    step is one forecast and one dot product; the first move is applied and
+    clamped to `limits`.
+    """
+
+    def __init__(
+        self,
+        model_params: tuple[float, float, float],
+        limits: tuple[float, float] = (0, 100),
+        horizon: int = 30,
+        control_horizon: int = 5,
+        move_weight: float = 1.0,
+        dt: float = 1.0,
+        mv_offset: float | None = None,
+    ) -> None:
+        gain, tau, dead_time = model_params
+        self.horizon = horizon
+        self.__lower, self.__upper = sorted(limits)
+        self.mv_offset = self.__lower if mv_offset is None else mv_offset
+        self.__model = FOPDTPredictor((gain, tau, dead_time, 0.0), dt)
+
+        # Dynamic matrix: effect of a unit move at k + j on CV at k + 1 .. k + horizon
+        step = FOPDTPredictor((gain, tau, dead_time, 0.0), dt).forecast(1.0, horizon)
+        dynamic = np.zeros((horizon, control_horizon))
+        for j in range(control_horizon):
+            dynamic[j:, j] = step[: horizon - j]
+        hessian = dynamic.T @ dynamic + move_weight * np.eye(control_horizon)
+
+        # Only the first move is ever applied
+        self.__gain_row = np.linalg.solve(hessian, dynamic.T)[0]
+        self.reset()
+
+    def __call__(self, SP, CV) -> float:
+        model = self.__model
+        held = self.__pre_mv - self.mv_offset
+        free = model.forecast(held, self.horizon) + (CV - model.cv)
+
+        mv = self.__pre_mv + float(self.__gain_row @ (SP - free))
+        lower, upper = self.__lower, self.__upper
+        mv = lower if mv < lower else (upper if mv > upper else mv)
+
+        model.push(mv - self.mv_offset)
+        self.__pre_mv = mv
+        return mv
+
+    def reset(self) -> None:
+        """
+        ## Restart from the steady state at `mv_offset`.
+        """
+        self.__model.reset()
+        self.__pre_mv = self.mv_offset
@@ -0,0 +1,106 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+
+from bisect import bisect_right
+from csv import reader as read
+
+
+class GainSchedule:
+    """
+    ## PID gains tabulated against an operating point.
+
+    Gains are linearly interpolated between the points and held beyond the
+    first and last ones. A lookup is a bisection over plain lists.
+    """
+
+    def __init__(self, points: list[float], gains: list[tuple[float, float, float]]) -> None:
+        rows = sorted(zip(points, gains, strict=True))
+        self.points = [float(point) for point, _ in rows]
+        self.gains = [tuple(map(float, gain)) for _, gain in rows]
+
+    @classmethod
+    def from_csv(cls, file: str) -> "GainSchedule":
+        """
+        ## Load a table written by `controller_design/schedule.py`.
+
+        The first column is the operating point, followed by Kp, Ki, and Kd.
+        """
+        with open(file, encoding="utf-8", newline="") as csvfile:
+            rows = list(read(csvfile))[1:]
+        return cls(
+            [float(row[0]) for row in rows], [tuple(map(float, row[1:4])) for row in rows]
+        )
+
+    def __call__(self, point: float) -> tuple[float, float, float]:
+        points = self.points
+        index = bisect_right(points, point)
+        if index == 0:
+            return self.gains[0]
+        if index == len(points):
+            return self.gains[-1]
+
+        left, right = points[index - 1], points[index]
+        weight = (point - left) / (right - left)
+        low, high = self.gains[index - 1], self.gains[index]
+        return (
+            low[0] + weight * (high[0] - low[0]),
+            low[1] + weight * (high[1] - low[1]),
+            low[2] + weight * (high[2] - low[2]),
+        )
+
+
+class ScheduledPID:
+    """
+    ## `PID` / `LeanPID` whose gains follow a `GainSchedule`.
+
+    Before each step the schedule is read at the operating point, `sp` or
+    `cv` (the pressure band) or `mv` (the last valve opening), and the gains
+    are changed with `retune`, which keeps the MV free of bumps.
+    """
+
+    def __init__(self, controller, schedule: GainSchedule, by: str = "cv") -> None:
+        if by not in ("sp", "cv", "mv"):
+            raise ValueError("Schedule variable should be 'sp', 'cv', or 'mv'!")
+        self.controller = controller
+        self.schedule = schedule
+        self.by = by
+        self.__pre_mv = None
+
+    @property
+    def element_value(self) -> tuple[float, float, float]:
+        return self.controller.element_value
+
+    def __call__(self, SP, CV) -> float:
+        # No MV is known before the first step, so the initial gains are kept
+        match self.by:
+            case "sp":
+                point = SP
+            case "cv":
+                point = CV
+            case _:
+                point = self.__pre_mv
+
+        if point is not None:
+            gains = self.schedule(point)
+            if gains != self.controller.gain_adjustment:
+                self.controller.retune(gains)
+
+        mv = self.__pre_mv = self.controller(SP, CV)
+        return mv
+
+    def reset(self) -> None:
+        self.controller.reset()
+        self.__pre_mv = None
@@ -0,0 +1,109 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Excitation signals for identification experiments, one value per sample.
+
+Every signal is generated ahead of time from its seed, so a run is reproducible
+and the loop that plays it back only indexes an array.
+"""
+
+import numpy as np
+
+# Feedback taps (polynomial exponents) of a maximal-length Fibonacci LFSR per order
+TAPS = {
+    2: (2, 1),
+    3: (3, 2),
+    4: (4, 3),
+    5: (5, 3),
+    6: (6, 5),
+    7: (7, 6),
+    8: (8, 6, 5, 4),
+    9: (9, 5),
+    10: (10, 7),
+    11: (11, 9),
+    12: (12, 6, 4, 1),
+    13: (13, 4, 3, 1),
+    14: (14, 5, 3, 1),
+    15: (15, 14),
+    16: (16, 15, 13, 4),
+}
+
+
+def prbs(
+    order: int, low: float, high: float, hold: int = 1, periods: int = 1, seed: int = 1
+) -> np.ndarray:
+    """
+    ## Maximal-length pseudo-random binary sequence between `low` and `high`.
+
+    One period has 2**order - 1 bits, each held for `hold` samples, so the
+    longest constant run is `order * hold` samples. `seed` is the initial
+    LFSR state, from 1 to 2**order - 1.
+    """
+    if order not in TAPS:
+        raise ValueError(f"PRBS order should range from {min(TAPS)} to {max(TAPS)}!")
+    length = 2**order - 1
+    if not 0 < seed <= length:
+        raise ValueError(f"PRBS seed should range from 1 to {length}!")
+
+    shifts = [order - tap for tap in TAPS[order]]
+    bits = np.empty(length, dtype=bool)
+    state = seed
+    for index in range(length):
+        bits[index] = state & 1
+        feedback = 0
+        for shift in shifts:
+            feedback ^= state >> shift
+        state = (state >> 1) | ((feedback & 1) << (order - 1))
+
+    signal = np.where(bits, high, low).astype(float)
+    return np.tile(np.repeat(signal, hold), periods)
+
+
+def multisine(
+    length: int, low: float, high: float, harmonics=range(1, 11), seed: int | None = None
+) -> np.ndarray:
+    """
+    ## One period of a sum of cosines, scaled to span `low` .. `high`.
+
+    Harmonic k completes k cycles in `length` samples. The phases are drawn
+    from `seed`, which keeps the peaks lower than equal phases would.
+    """
+    harmonics = np.asarray(harmonics, dtype=float)
+    phases = np.random.default_rng(seed).uniform(0, 2 * np.pi, len(harmonics))
+    angle = 2 * np.pi * np.outer(np.arange(length), harmonics) / length + phases
+    signal = np.cos(angle).sum(axis=1)
+
+    span = signal.max() - signal.min()
+    return low + (signal - signal.min()) / span * (high - low)
+
+
+def random_steps(
+    n_steps: int, levels, min_hold: int, max_hold: int, seed: int | None = None
+) -> np.ndarray:
+    """
+    ## `n_steps` steps between random `levels`, each held `min_hold` .. `max_hold` samples.
+
+    Consecutive steps always change level.
+    """
+    levels = np.asarray(levels, dtype=float)
+    rng = np.random.default_rng(seed)
+    holds = rng.integers(min_hold, max_hold + 1, n_steps)
+
+    # A nonzero offset modulo the number of levels moves to another level
+    offsets = rng.integers(1, len(levels), n_steps)
+    offsets[0] = rng.integers(len(levels))
+    return np.repeat(levels[np.cumsum(offsets) % len(levels)], holds)
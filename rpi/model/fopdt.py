@@ -14,7 +14,31 @@
 # PRPCE. If not, see <https://www.gnu.org/licenses/>.
 
 
+from collections import deque
+from math import exp
+
+import numpy as np
 from scipy.integrate import odeint as ode
+from scipy.signal import lfilter
+
+from model.input_signal import InputSignal
+
+
+def discretize(tau: float, dead_time: float, dt: float = 1.0) -> tuple:
+    """
+    ## Exact discretization of the FOPDT model under a zero-order-hold MV.
+
+    With `dead_time = (delay + f) * dt`, the MV seen during one sample period
+    switches from `mv[n - delay - 1]` to `mv[n - delay]` after `f * dt`, so
+    `x[n+1] = pole * x[n] + gain * (b1 * mv[n - delay - 1] + b0 * mv[n - delay])`.
+
+    #### Return value:
+    (pole, delay, b0, b1)
+    """
+    delay, frac = divmod(dead_time / dt, 1.0)
+    tail = exp(-(1.0 - frac) * dt / tau)
+    pole = exp(-dt / tau)
+    return pole, int(delay), 1.0 - tail, tail - pole
 
 
 class FOPDT:
@@ -22,6 +46,15 @@ class FOPDT:
         self.mv = manipulated_params
         self.__gain, self.__tau, self.__dead_time, self.__deviation = 0, 0, 0, 0
 
+    @property
+    def mv(self):
+        return self.__input.values
+
+    @mv.setter
+    def mv(self, manipulated_params: list) -> None:
+        # MV is zero before the first sample and holds its last value afterwards
+        self.__input = InputSignal(manipulated_params, before=0)
+
     @property
     def model_params(self) -> tuple[float, float, float, float]:
         return self.__gain, self.__tau, self.__dead_time, self.__deviation
@@ -34,14 +67,112 @@ class FOPDT:
         self.__gain, self.__tau, self.__dead_time, self.__deviation = params
 
     def __dydt(self, cv, t) -> float:
-        temp_t = int(t - self.__dead_time)
-        if temp_t <= 0:
-            unit_step = 0
-        elif temp_t >= len(self.mv):
-            unit_step = self.mv[-1]
-        else:
-            unit_step = self.mv[temp_t]
+        unit_step = self.__input(t - self.__dead_time)
         return (-(cv - self.__deviation) + self.__gain * unit_step) / self.__tau
 
     def __call__(self, CV, t):
         return ode(self.__dydt, CV, t)[-1]
+
+    def trajectory(self, CV: float, t: np.ndarray) -> np.ndarray:
+        """
+        ## Response from `CV` at `t[0]` over the whole uniform grid `t`.
+
+        Uses the exact recurrence of `discretize` instead of integrating, so a
+        whole run costs one `lfilter` call. Matches `__call__` step by step
+        when the MV changes on the grid.
+
+        #### Return value:
+        CV at every point of `t`
+        """
+        t = np.asarray(t, dtype=float)
+        dt = t[1] - t[0]
+        pole, delay, b0, b1 = discretize(self.__tau, self.__dead_time, dt)
+
+        k = np.arange(1, len(t))
+        now = self.__input.sample(t[0] + (k - 1 - delay) * dt)
+        older = self.__input.sample(t[0] + (k - 2 - delay) * dt)
+
+        drive = np.empty(len(t))
+        drive[0] = CV - self.__deviation
+        drive[1:] = self.__gain * (b0 * now + b1 * older)
+        return self.__deviation + lfilter([1.0], [1.0, -pole], drive)
+
+
+class FOPDTPredictor:
+    """
+    ## Streaming form of `FOPDT` for the sampling loop.
+
+    Keeps the deviation state and a delay line of the last `delay + 2` MVs,
+    and applies the exact recurrence of `discretize` once per `push`, so each
+    step costs a few multiplications whatever the run length. `push(mv[i])`
+    returns the same CV at `t[i + 1]` as `FOPDT(mv)(cv[i], [t[i], t[i + 1]])`.
+    """
+
+    def __init__(
+        self,
+        model_params: tuple[float, float, float, float],
+        dt: float = 1.0,
+        initial_mv: float = 0.0,
+    ) -> None:
+        self.dt = dt
+        self.initial_mv = initial_mv
+        self.model_params = model_params
+
+    @property
+    def model_params(self) -> tuple[float, float, float, float]:
+        return self.__gain, self.__tau, self.__dead_time, self.__deviation
+
+    @model_params.setter
+    def model_params(self, params: tuple[float, float, float, float]) -> None:
+        """
+        Setting gain, time constant, dead time, and deviation. Resets the state.
+        """
+        self.__gain, self.__tau, self.__dead_time, self.__deviation = params
+        pole, delay, b0, b1 = discretize(self.__tau, self.__dead_time, self.dt)
+        self.__pole, self.__b0, self.__b1 = pole, self.__gain * b0, self.__gain * b1
+        self.__delay = delay
+        self.reset()
+
+    def reset(self, cv: float | None = None) -> None:
+        """
+        ## Restart from `cv` (default: the deviation) with the MV history at `initial_mv`.
+        """
+        self.__x = 0.0 if cv is None else cv - self.__deviation
+        self.__line = deque([self.initial_mv] * (self.__delay + 2), maxlen=self.__delay + 2)
+
+    @property
+    def cv(self) -> float:
+        return self.__deviation + self.__x
+
+    def push(self, mv: float) -> float:
+        """
+        ## Apply `mv` for one sample period.
+
+        #### Return value:
+        Predicted CV at the end of the period
+        """
+        line = self.__line
+        line.append(mv)
+        # line[0] is mv[n - delay - 1], line[1] is mv[n - delay]
+        self.__x = self.__pole * self.__x + self.__b1 * line[0] + self.__b0 * line[1]
+        return self.__deviation + self.__x
+
+    def forecast(self, mv: list[float] | float, steps: int | None = None) -> np.ndarray:
+        """
+        ## Multi-step-ahead prediction without changing the state.
+
+        `mv` is the planned MV sequence, or a single MV held for `steps` periods.
+
+        #### Return value:
+        Predicted CV at the end of each future period
+        """
+        plan = [mv] * steps if np.isscalar(mv) else list(mv)
+        pole, b0, b1 = self.__pole, self.__b0, self.__b1
+        line = list(self.__line)
+        x = self.__x
+        out = np.empty(len(plan))
+        for i, u in enumerate(plan):
+            line.append(u)
+            x = pole * x + b1 * line[i + 1] + b0 * line[i + 2]
+            out[i] = x
+        return self.__deviation + out
@@ -14,15 +14,40 @@
 # PRPCE. If not, see <https://www.gnu.org/licenses/>.
 
 
-from csv import writer as write
-from random import randint
-from time import sleep, time
+import numpy as np
 
+from model.excitation import multisine, prbs, random_steps
 from utils.adc import ADS1256
 from utils.convert import Converter
 from utils.dac import DAC8532
-from utils.wrapper import cleanup, termination
+from utils.logger import DataLogger
+from utils.scheduler import PeriodicScheduler
+from utils.wrapper import cleanup, now_ns, pause, termination
 
+# "prbs", "multisine" or "steps"; the valve opening is held between LOW and HIGH
+SIGNAL = "prbs"
+SEED = 1
+LOW, HIGH = 6, 9
+
+
+def excitation(signal: str, seed: int) -> np.ndarray:
+    # Valve opening per second
+    match signal:
+        case "prbs":
+            # 63 bits of 5 s: 315 s, with runs from 5 s up to 25 s (about 1.7 tau)
+            # for seed 1, whose run of six equal bits is split across the period
+            # boundary; most other seeds keep it whole, a 30 s run (about 2 tau)
+            return prbs(6, LOW, HIGH, hold=5, seed=seed)
+        case "multisine":
+            # Periods from 300 s down to 20 s, at the 0.1 % resolution of control.py
+            return np.round(multisine(300, LOW, HIGH, range(1, 16), seed=seed), 1)
+        case "steps":
+            # The former multi-step test: 7 steps of 50 s to 80 s
+            return random_steps(7, range(LOW, HIGH + 1), 50, 80, seed=seed)
+    raise ValueError("Signal should be 'prbs', 'multisine', or 'steps'!")
+
+
+logger = None
 try:
     ADC = ADS1256()
     DAC = DAC8532()
@@ -31,38 +56,33 @@ try:
 
     DAC.output_volt(0.0)
     DAC.output_volt(0.0, DAC.CH_B)
-    sleep(5)
-
-    file = "./multi_step_data/multi_step_change.csv"
-    with open(file, mode="w", encoding="utf-8", newline="") as csvfile:
-        writer = write(csvfile)
-        writer.writerow(["Time consuming", "Valve opening", "Pressure"])
-
-    times = 7
-    sample_lst = [6, 9, 7, 8, 9, 6, 8]
-    print(sample_lst)
-    time_per_step = 0
+    pause(5)
 
-    start_time = time()
-    for step in range(times):
-        valve_opening = sample_lst[step]
+    # One file per signal and seed, keeping multi_step_change.csv as the step reference
+    file = f"./multi_step_data/{SIGNAL}_{SEED}.csv"
+    logger = DataLogger(
+        file,
+        ["Time consuming", "Valve opening", "Pressure"],
+        [".2f", ".1f", ".1f"],
+        clock=now_ns,
+    )
 
-        time_per_step += 60 + randint(-10, 20)
-        while (now := time() - start_time) <= time_per_step:
-            DAC.output_volt(valve2volt(valve_opening))
-            sleep(1)
-            digital_val = ADC.get_channel_value(0)
-            pressure = dig2p(digital_val)
+    valve = excitation(SIGNAL, SEED)
+    codes = DAC.volts_to_codes(valve2volt(valve)).tolist()
+    print(f"{SIGNAL} (seed {SEED}): {len(valve)} s")
 
-            with open(file, mode="a", encoding="utf-8", newline="") as csvfile:
-                writer = write(csvfile)
-                writer.writerow(
-                    [
-                        f"{now:.2f}",
-                        f"{valve_opening}",
-                        f"{pressure:.1f}",
-                    ]
-                )
+    # Sample n of the signal is applied at tick n; the pressure is read at the
+    # next tick, as in the former multi-step test
+    scheduler = PeriodicScheduler(1, now_ns, pause)
+    for valve_opening, code in zip(valve.tolist(), codes, strict=True):
+        now = scheduler.elapsed()
+        DAC.output_code(code)
+        scheduler.wait()
+        digital_val = ADC.get_channel_value(0)
+        pressure = dig2p(digital_val)
+        logger.log(now, valve_opening, pressure)
+    print(scheduler.report())
+    print(f"DAC writes skipped: {DAC.skipped_writes}")
 
 
 except KeyboardInterrupt:
@@ -70,6 +90,8 @@ except KeyboardInterrupt:
 except Exception as err:
     termination(err)
 finally:
+    if logger is not None:
+        logger.close()
     DAC.output_volt(0.0)
     DAC.output_volt(0.0, DAC.CH_B)
     cleanup()
@@ -0,0 +1,170 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Replay logged runs through the controller and the model, without the rig.
+
+    python replay.py control_result/*.csv multi_step_data/*.csv --summary replay.csv
+
+Each log (time, valve opening, pressure) is fed to `model.fopdt.FOPDT` to get
+the predicted-versus-actual pressure, and its pressures are fed to
+`controller.pid.PID` to check the valve openings it would command now.
+"""
+
+from argparse import ArgumentParser
+from csv import writer as write
+from glob import glob
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+from controller.pid import PID
+from model.fopdt import FOPDT
+
+PID_GAIN = (-10.941, -1.351, 0)
+SET_POINT = 4.2
+LIMITS = (6, 9)
+
+# Model Kp, tau, theta
+MODEL_PARAMS = (-0.347, 14.720, 3.865)
+
+# Valve opening the model deviation is taken from
+INITIAL_VALVE = 6
+TIME_PER_STEP = 1
+
+COLUMNS = ["file", "samples", "RSS", "RMSE", "max error", "IAE", "MV max diff"]
+TRACE_HEADER = ["Time consuming", "Valve opening", "Pressure", "Model Predict", "Replay MV"]
+
+
+def load_run(file: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    ## Read the time, valve opening and pressure columns of a logged run.
+
+    #### Return value:
+    (time, valve, pressure)
+    """
+    data = np.loadtxt(file, delimiter=",", skiprows=1, usecols=(0, 1, 2), ndmin=2)
+    return data[:, 0], data[:, 1], data[:, 2]
+
+
+def replay(
+    valve: np.ndarray,
+    pressure: np.ndarray,
+    gains: tuple[float, float, float] = PID_GAIN,
+    set_point: float | None = SET_POINT,
+    model_params: tuple[float, float, float] = MODEL_PARAMS,
+    limits: tuple[float, float] = LIMITS,
+) -> tuple[dict[str, np.ndarray], dict[str, float]]:
+    """
+    ## Run one log through the model and, unless `set_point` is None, the PID.
+
+    The model sees the valve openings the same way `control.py` feeds it (one
+    per step, truncated, relative to `INITIAL_VALVE`) and starts from the first
+    logged pressure. The PID sees the logged pressures in order, so a change
+    of gains or of the control law shows up as a difference in MV.
+
+    #### Return value:
+    (trace, metrics) where trace holds `predict` and `mv` arrays and metrics
+    holds `RSS`, `RMSE`, `max error`, `IAE` and `MV max diff`.
+    """
+    n = len(pressure)
+    t = np.arange(n) * TIME_PER_STEP
+
+    model = FOPDT(np.trunc(valve) - INITIAL_VALVE)
+    model.model_params = (*model_params, pressure[0])
+    predict = model.trajectory(pressure[0], t)
+    error = predict - pressure
+
+    metrics = {
+        "RSS": float(error @ error),
+        "RMSE": float(np.sqrt(error @ error / n)),
+        "max error": float(np.max(np.abs(error))),
+        "IAE": float("nan"),
+        "MV max diff": float("nan"),
+    }
+    trace = {"predict": predict, "mv": np.full(n, np.nan)}
+
+    if set_point is not None:
+        controller = PID(*limits)
+        controller.gain_adjustment = gains
+        mv = np.array([round(controller(set_point, pv), 1) for pv in pressure.tolist()])
+        trace["mv"] = mv
+        metrics["IAE"] = float(np.sum(np.abs(set_point - pressure)) * TIME_PER_STEP)
+        metrics["MV max diff"] = float(np.max(np.abs(mv - valve)))
+
+    return trace, metrics
+
+
+def save_trace(file: str, time, valve, pressure, trace: dict[str, np.ndarray]) -> None:
+    with open(file, mode="w", encoding="utf-8", newline="") as csvfile:
+        writer = write(csvfile)
+        writer.writerow(TRACE_HEADER)
+        writer.writerows(
+            [f"{a:.2f}", f"{b:g}", f"{c:.1f}", f"{d:.3f}", f"{e:g}"]
+            for a, b, c, d, e in zip(
+                time, valve, pressure, trace["predict"], trace["mv"], strict=True
+            )
+        )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = ArgumentParser(description="Replay logged runs through the PID and the model.")
+    parser.add_argument("patterns", nargs="+", help="glob(s) of logged CSV files")
+    parser.add_argument("--summary", default=None, help="write the metrics to this CSV")
+    parser.add_argument("--trace", default=None, help="write a trace CSV per run here")
+    parser.add_argument(
+        "--gains", type=float, nargs=3, default=PID_GAIN, metavar=("KP", "KI", "KD")
+    )
+    parser.add_argument("--set-point", type=float, default=SET_POINT)
+    parser.add_argument(
+        "--open-loop", action="store_true", help="model only, e.g. for step tests"
+    )
+    args = parser.parse_args(argv)
+
+    files = sorted({f for pattern in args.patterns for f in glob(pattern)})
+    set_point = None if args.open_loop else args.set_point
+
+    rows = []
+    start = perf_counter()
+    for file in files:
+        time, valve, pressure = load_run(file)
+        trace, metrics = replay(valve, pressure, tuple(args.gains), set_point)
+        rows.append([file, len(pressure), *metrics.values()])
+        if args.trace is not None:
+            Path(args.trace).mkdir(parents=True, exist_ok=True)
+            save_trace(
+                str(Path(args.trace) / f"{Path(file).stem}_replay.csv"),
+                time,
+                valve,
+                pressure,
+                trace,
+            )
+    elapsed = perf_counter() - start
+
+    for row in rows:
+        print(", ".join([row[0], str(row[1])] + [f"{v:.4f}" for v in row[2:]]))
+    print(f"{len(rows)} runs in {elapsed:.3f} s")
+
+    if args.summary is not None:
+        with open(args.summary, mode="w", encoding="utf-8", newline="") as csvfile:
+            writer = write(csvfile)
+            writer.writerow(COLUMNS)
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
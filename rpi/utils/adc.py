@@ -14,22 +14,32 @@
 # PRPCE. If not, see <https://www.gnu.org/licenses/>.
 
 
-from typing import List
+from collections.abc import Generator
 
+import numpy as np
+
+from utils.timing import wait_us
 from utils.wrapper import (
     AD_CS_PIN,
     AD_RST_PIN,
+    AD_SPI_HZ,
+    SPIDevice,
     adc_pin_init,
-    chip_select,
-    delay,
     gpo_high,
     gpo_low,
-    spi_read,
-    spi_write,
+    now_ns,
     termination,
     wait_data_ready,
 )
 
+""" Delays """
+# In microseconds (fCLKIN = 7.68 MHz, tCLKIN = 130 ns), each at its datasheet
+# minimum rounded up. Delays between SPI bytes are held by the kernel after the
+# transfer (`delay_usecs`), the others are `utils.timing` waits
+RESET_PULSE_US = 1  # RESET low: 4 tCLKIN
+SYNC_WAKEUP_US = 4  # SYNC to WAKEUP: t11 = 24 tCLKIN
+DIN_DOUT_US = 7  # RDATA / RREG to the first DOUT bit: t6 = 50 tCLKIN
+
 """ Gain Channel """
 # GAIN = {2**n: n for n in range(7)}
 GAIN = {
@@ -95,46 +105,64 @@ CMD_RESET = 0xFE
 
 
 class ADS1256:
-    def __init__(self, background_noise: int = 19925, diff_mode: bool = False) -> None:
+    def __init__(
+        self, background_noise: int = 19925, diff_mode: bool = False, spi_hz: int = AD_SPI_HZ
+    ) -> None:
         self.noise = background_noise
         self.diff_mode = diff_mode
+        self.spi = SPIDevice(AD_CS_PIN, spi_hz)
+
+        # Channel whose conversion was started by the last scan step, and the
+        # rate achieved by the last scan (scans per second)
+        self.__pending = None
+        self.scan_rate = 0.0
+
         self.__init()
 
     # Hardware Reset
     def __reset(self) -> None:
         gpo_high(AD_RST_PIN)
-        delay(200)
         gpo_low(AD_RST_PIN)
-        delay(200)
+        wait_us(RESET_PULSE_US, "reset")
         gpo_high(AD_RST_PIN)
 
-    @chip_select(AD_CS_PIN)
-    def __read_reg_data(self, reg: bytes) -> List[bytes]:
-        spi_write([CMD_RREG | reg, 0x00])
-        return spi_read(1)
+        # Self-calibration follows: DRDY goes high, then low once it is done
+        wait_data_ready.wait_busy()
+        wait_data_ready()
 
-    @chip_select(AD_CS_PIN)
-    def __write_reg_data(self, reg: bytes, data: bytes) -> None:
-        spi_write([CMD_WREG | reg, 0x00, data])
+    def __read_reg_data(self, reg: bytes) -> list[bytes]:
+        return self.spi.query([CMD_RREG | reg, 0x00], 1, delay_usecs=DIN_DOUT_US)
 
-    @chip_select(AD_CS_PIN)
-    def __write_cfg_reg_data(self, data: List[bytes]) -> None:
-        spi_write([CMD_WREG | 0, 0x03])
-        spi_write(data)
+    def __write_cfg_reg_data(self, data: list[bytes]) -> None:
+        self.spi.write([CMD_WREG | 0, 0x03, *data])
 
-    @chip_select(AD_CS_PIN)
     def __send_command(self, command: bytes) -> None:
-        spi_write([command])
-
-    @chip_select(AD_CS_PIN)
-    def __read_data(self) -> List[bytes]:
-        spi_write([CMD_RDATA])
-        return spi_read(3)
+        self.spi.write([command])
+
+    def __read_data(self) -> list[bytes]:
+        return self.spi.query([CMD_RDATA], 3, delay_usecs=DIN_DOUT_US)
+
+    def __read_continuous(self) -> list[bytes]:
+        # In RDATAC mode the conversion result is clocked out without a command
+        return self.spi.query([], 3)
+
+    def __restart(self, channel: int) -> None:
+        # Select the input and restart the conversion, SYNC held for t11
+        # before WAKEUP, in one CS cycle
+        self.__pending = None
+        with self.spi.transaction():
+            self.spi.xfer(
+                [CMD_WREG | REG_MUX, 0x00, self.__mux(channel), CMD_SYNC],
+                delay_usecs=SYNC_WAKEUP_US,
+            )
+            self.spi.xfer([CMD_WAKEUP])
 
     def __process_data(self) -> int:
         wait_data_ready()
+        return self.__decode(self.__read_data())
 
-        data = self.__read_data()
+    @staticmethod
+    def __decode(data: list[bytes]) -> int:
         result = (data[0] << 16) & 0xFF0000
         result |= (data[1] << 8) & 0xFF00
         result |= (data[2] << 0) & 0xFF
@@ -147,14 +175,14 @@ class ADS1256:
     def __config_adc(self, ch_gain: int, data_rate: int) -> None:
         wait_data_ready()
 
-        buffer: List[bytes] = [0] * 8
+        buffer: list[bytes] = [0] * 8
         buffer[0] = 0 << 3 | 1 << 2 | 0 << 1
         buffer[1] = 0x08
         buffer[2] = 0 << 5 | 0 << 3 | ch_gain << 0
         buffer[3] = data_rate
 
+        # The new settings take effect with the next conversion, waited for on DRDY
         self.__write_cfg_reg_data(buffer)
-        delay(10)
 
     def __chip_id(self) -> int:
         wait_data_ready()
@@ -169,7 +197,7 @@ class ADS1256:
         self.__config_adc(GAIN[1], SPS[30000])
         print("ADS1256 Init Success!")
 
-    def __set_channel(self, channel: int) -> None:
+    def __mux(self, channel: int) -> int:
         if not self.diff_mode:
             # Single-ended
             data = (channel << 4) | (1 << 3)
@@ -184,10 +212,9 @@ class ADS1256:
                     data = (4 << 4) | 5  # AIN4 - AIN5
                 case 3:
                     data = (6 << 4) | 7  # AIN6 - AIN7
+        return data
 
-        self.__write_reg_data(REG_MUX, data)
-
-    def get_channel_value(self, channel: int) -> int:
+    def __check_channel(self, channel: int) -> None:
         if (channel < 0) or not isinstance(channel, int):
             termination(ValueError("Channel index should be a positive integer!"))
 
@@ -196,12 +223,115 @@ class ADS1256:
         elif channel > 7:
             termination(ValueError("Channel index should range from 0 to 7!"))
 
-        self.__set_channel(channel)
-        self.__send_command(CMD_SYNC)
-        delay(10)
-        self.__send_command(CMD_WAKEUP)
+    def get_channel_value(self, channel: int) -> int:
+        self.__check_channel(channel)
+
+        self.__restart(channel)
         value = self.__process_data()
         return value - self.noise
 
-    def get_all_channel_value(self) -> List[int]:
-        return [self.get_channel_value(i) for i in range(8)]
+    def get_all_channel_value(self) -> list[int]:
+        return self.scan().tolist()
+
+    def __scan_step(self, next_mux: int, read: bool) -> list[bytes]:
+        # Datasheet "cycling through the inputs" sequence: switch the MUX to the
+        # next input and restart the conversion, then read the result of the
+        # previous input, in three transfers instead of five CS cycles.
+        spi = self.spi
+        with spi.transaction():
+            spi.xfer([CMD_WREG | REG_MUX, 0x00, next_mux, CMD_SYNC], SYNC_WAKEUP_US)
+            if not read:
+                spi.xfer([CMD_WAKEUP])
+                return []
+            spi.xfer([CMD_WAKEUP, CMD_RDATA], DIN_DOUT_US)
+            return spi.xfer([0xFF, 0xFF, 0xFF])
+
+    def scan(self, channels: list[int] | None = None) -> np.ndarray:
+        """
+        ### Read several channels with the pipelined MUX sequence.
+        ---
+        Note:
+        - `channels` defaults to every input (4 in differential mode, else 8).
+        - While the result of one channel is read, the next one is already
+        converting. The first channel of the next scan is started at the end
+        of this one, so back-to-back scans need no extra priming step.
+        - The achieved rate of this scan is stored in `scan_rate`.
+        """
+        if channels is None:
+            channels = list(range(4 if self.diff_mode else 8))
+        for channel in channels:
+            self.__check_channel(channel)
+        muxes = [self.__mux(channel) for channel in channels]
+
+        start = now_ns()
+        if self.__pending != muxes[0]:
+            wait_data_ready()
+            self.__scan_step(muxes[0], read=False)
+
+        values = np.empty(len(muxes), dtype=np.int64)
+        for index in range(len(muxes)):
+            wait_data_ready()
+            next_mux = muxes[(index + 1) % len(muxes)]
+            values[index] = self.__decode(self.__scan_step(next_mux, read=True))
+        self.__pending = muxes[0]
+
+        self.scan_rate = 1e9 / max(now_ns() - start, 1)
+        return values - self.noise
+
+    def stream(
+        self, channel: int = 0, rate: float = 1000, n_samples: int | None = None
+    ) -> Generator[tuple[float, int], None, None]:
+        """
+        ### Yield `(timestamp, value)` samples in continuous-read (RDATAC) mode.
+        ---
+        Note:
+        - `rate` must be a key of `SPS`; the chip converts at that rate and each
+        sample is read as soon as DRDY falls, without MUX/SYNC/RDATA per sample.
+        - `timestamp` is the monotonic clock of the backend, in seconds.
+        - Closing the generator (or exhausting `n_samples`) issues SDATAC and
+        restores the default data rate.
+        """
+        self.__check_channel(channel)
+        if rate not in SPS:
+            termination(ValueError(f"Sampling rate should be one of {list(SPS)}!"))
+
+        self.__config_adc(GAIN[1], SPS[rate])
+        self.__restart(channel)
+        wait_data_ready()
+        self.__send_command(CMD_RDATAC)
+
+        try:
+            count = 0
+            while n_samples is None or count < n_samples:
+                wait_data_ready()
+                data = self.__read_continuous()
+                yield now_ns() / 1e9, self.__decode(data) - self.noise
+                count += 1
+        finally:
+            wait_data_ready()
+            self.__send_command(CMD_SDATAC)
+            self.__config_adc(GAIN[1], SPS[30000])
+
+    def stream_into(
+        self,
+        values: np.ndarray,
+        timestamps: np.ndarray,
+        n_samples: int,
+        channel: int = 0,
+        rate: float = 1000,
+    ) -> int:
+        """
+        ### Fill preallocated arrays as a ring buffer from `stream()`.
+        ---
+        Sample `k` is stored at index `k % len(values)`.
+
+        #### Return value:
+        Number of samples acquired
+        """
+        size = len(values)
+        count = 0
+        for count, (stamp, value) in enumerate(self.stream(channel, rate, n_samples), 1):
+            index = (count - 1) % size
+            values[index] = value
+            timestamps[index] = stamp
+        return count
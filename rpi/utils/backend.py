@@ -0,0 +1,251 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+
+LOW, HIGH = 0, 1
+OUT, IN = "out", "in"
+
+# Final part of a delay spent spinning on the clock: sleeps overshoot by tens of
+# microseconds on the Pi, spinning does not
+SPIN_NS = 200_000
+
+
+class Backend(ABC):
+    """
+    ## GPIO / SPI / clock interface used by `utils.wrapper`.
+
+    Pins are BCM numbers, levels are `LOW`/`HIGH`, SPI data are lists of ints.
+    GPIO and SPI methods are abstract, so a backend missing one fails when it
+    is created; the clock defaults to the host's.
+    """
+
+    @abstractmethod
+    def setup(self, pin: int, direction: str, pull_up: bool = False) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def output(self, pin: int, level: int) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def input(self, pin: int) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def wait_for_falling_edge(self, pin: int, timeout_ms: int) -> None:
+        """
+        ## Block until `pin` falls or `timeout_ms` passes.
+
+        Raise RuntimeError if edge detection is not available on the pin.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def spi_xfer(self, data: list[int], delay_usecs: int = 0, speed_hz: int = 0) -> list[int]:
+        """
+        ## One full-duplex transfer, clocked at `speed_hz` (0: the bus default).
+
+        `delay_usecs` is held after the last byte.
+        """
+        raise NotImplementedError
+
+    def monotonic_ns(self) -> int:
+        return time.monotonic_ns()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+    def delay_ns(self, nanoseconds: int) -> None:
+        """
+        ## Wait precisely: sleep until `SPIN_NS` before the deadline, then spin.
+        """
+        clock = self.monotonic_ns
+        deadline = clock() + nanoseconds
+        if nanoseconds > SPIN_NS:
+            self.sleep((nanoseconds - SPIN_NS) / 1e9)
+        while clock() < deadline:
+            pass
+
+    def cleanup(self) -> None:  # noqa: B027 (optional hook, nothing to release by default)
+        pass
+
+
+class HardwareBackend(Backend):
+    """
+    ## RPi.GPIO + spidev on the Raspberry Pi.
+    """
+
+    def __init__(self, bus: int = 0, device: int = 0, max_speed_hz: int = 20000) -> None:
+        import RPi.GPIO as GPIO
+        import spidev
+
+        self.__gpio = GPIO
+        GPIO.setwarnings(False)
+        GPIO.setmode(GPIO.BCM)
+
+        self.__spi = spidev.SpiDev()
+        self.__spi.open(bus, device)
+        self.__spi.max_speed_hz = max_speed_hz
+        self.__spi.mode = 0b01
+
+    def setup(self, pin: int, direction: str, pull_up: bool = False) -> None:
+        GPIO = self.__gpio
+        if direction == OUT:
+            GPIO.setup(pin, GPIO.OUT)
+        elif pull_up:
+            GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+        else:
+            GPIO.setup(pin, GPIO.IN)
+
+    def output(self, pin: int, level: int) -> None:
+        self.__gpio.output(pin, self.__gpio.HIGH if level else self.__gpio.LOW)
+
+    def input(self, pin: int) -> int:
+        return self.__gpio.input(pin)
+
+    def wait_for_falling_edge(self, pin: int, timeout_ms: int) -> None:
+        self.__gpio.wait_for_edge(pin, self.__gpio.FALLING, timeout=timeout_ms)
+
+    def spi_xfer(self, data: list[int], delay_usecs: int = 0, speed_hz: int = 0) -> list[int]:
+        return self.__spi.xfer2(data, speed_hz or self.__spi.max_speed_hz, delay_usecs)
+
+    def cleanup(self) -> None:
+        self.__gpio.cleanup()
+
+
+class RecordingBackend(Backend):
+    """
+    ## Pass every call to `inner` and record it, with its result, as JSON lines.
+    """
+
+    def __init__(self, inner: Backend, file: str) -> None:
+        self.inner = inner
+        self.__file = open(file, mode="w", encoding="utf-8")  # noqa: SIM115
+
+    def __record(self, name: str, *args):
+        result = getattr(self.inner, name)(*args)
+        self.__file.write(json.dumps([name, list(args), result]) + "\n")
+        return result
+
+    def setup(self, pin: int, direction: str, pull_up: bool = False) -> None:
+        self.__record("setup", pin, direction, pull_up)
+
+    def output(self, pin: int, level: int) -> None:
+        self.__record("output", pin, level)
+
+    def input(self, pin: int) -> int:
+        return self.__record("input", pin)
+
+    def wait_for_falling_edge(self, pin: int, timeout_ms: int) -> None:
+        self.__record("wait_for_falling_edge", pin, timeout_ms)
+
+    def spi_xfer(self, data: list[int], delay_usecs: int = 0, speed_hz: int = 0) -> list[int]:
+        return self.__record("spi_xfer", list(data), delay_usecs, speed_hz)
+
+    def monotonic_ns(self) -> int:
+        return self.__record("monotonic_ns")
+
+    def sleep(self, seconds: float) -> None:
+        self.__record("sleep", seconds)
+
+    def delay_ns(self, nanoseconds: int) -> None:
+        self.__record("delay_ns", nanoseconds)
+
+    def cleanup(self) -> None:
+        self.__record("cleanup")
+        self.__file.close()
+
+
+class ReplayBackend(Backend):
+    """
+    ## Play back a `RecordingBackend` file without any hardware.
+
+    Calls must come in the recorded order; results are returned from the file
+    and sleeps take no time.
+    """
+
+    def __init__(self, file: str) -> None:
+        with open(file, encoding="utf-8") as jsonfile:
+            self.__calls = [json.loads(line) for line in jsonfile]
+        self.__index = 0
+
+    def __replay(self, name: str, *args):
+        if self.__index >= len(self.__calls):
+            raise RuntimeError(f"Replay exhausted at call {name}{args}")
+        recorded, recorded_args, result = self.__calls[self.__index]
+        if recorded != name or recorded_args != list(args):
+            raise RuntimeError(
+                f"Replay mismatch at call {self.__index}: "
+                f"expected {recorded}{tuple(recorded_args)}, got {name}{args}"
+            )
+        self.__index += 1
+        return result
+
+    def setup(self, pin: int, direction: str, pull_up: bool = False) -> None:
+        self.__replay("setup", pin, direction, pull_up)
+
+    def output(self, pin: int, level: int) -> None:
+        self.__replay("output", pin, level)
+
+    def input(self, pin: int) -> int:
+        return self.__replay("input", pin)
+
+    def wait_for_falling_edge(self, pin: int, timeout_ms: int) -> None:
+        self.__replay("wait_for_falling_edge", pin, timeout_ms)
+
+    def spi_xfer(self, data: list[int], delay_usecs: int = 0, speed_hz: int = 0) -> list[int]:
+        return self.__replay("spi_xfer", list(data), delay_usecs, speed_hz)
+
+    def monotonic_ns(self) -> int:
+        return self.__replay("monotonic_ns")
+
+    def sleep(self, seconds: float) -> None:
+        self.__replay("sleep", seconds)
+
+    def delay_ns(self, nanoseconds: int) -> None:
+        self.__replay("delay_ns", nanoseconds)
+
+    def cleanup(self) -> None:
+        self.__replay("cleanup")
+
+
+def from_env(spec: str | None = None) -> Backend:
+    """
+    ## Build the backend named by `spec` or the `PRPCE_BACKEND` variable.
+
+    - `hardware` (default): RPi.GPIO + spidev
+    - `sim`: `utils.simulated.SimulatedPlant` with its default settings
+    - `record:<file>`: hardware, recorded to `<file>`
+    - `replay:<file>`: play `<file>` back
+    """
+    spec = spec or os.environ.get("PRPCE_BACKEND", "hardware")
+    kind, _, file = spec.partition(":")
+    match kind:
+        case "hardware":
+            return HardwareBackend()
+        case "sim":
+            from utils.simulated import SimulatedPlant
+
+            return SimulatedPlant()
+        case "record":
+            return RecordingBackend(HardwareBackend(), file)
+        case "replay":
+            return ReplayBackend(file)
+    raise ValueError(f"Unknown backend {spec!r}")
@@ -14,7 +14,13 @@
 # PRPCE. If not, see <https://www.gnu.org/licenses/>.
 
 
-from utils.wrapper import DA_CS_PIN, chip_select, dac_pin_init, spi_write, termination
+import numpy as np
+
+from utils.timing import wait_us
+from utils.wrapper import DA_CS_PIN, DA_SPI_HZ, SPIDevice, dac_pin_init, termination
+
+# Output settling time to 0.003 % FSR, in microseconds (datasheet: 8 typ, 10 max)
+SETTLE_US = 10
 
 
 class DAC8532:
@@ -23,34 +29,83 @@ class DAC8532:
     __DIGITAL_MAX = 65535
     __VOLT_REF = 5.0
 
-    def __init__(self, volt_bias: float = 0.165) -> None:
+    def __init__(self, volt_bias: float = 0.165, spi_hz: int = DA_SPI_HZ) -> None:
         self.volt_bias = volt_bias
+        self.spi = SPIDevice(DA_CS_PIN, spi_hz)
+
+        # Last code written per channel (unknown at power-up), and the number
+        # of writes skipped because the channel already held the code
+        self.__codes: dict[int, int | None] = {self.CH_A: None, self.CH_B: None}
+        self.skipped_writes = 0
+
         dac_pin_init()
         print("DAC8532 Init Success!")
 
-    @chip_select(DA_CS_PIN)
+    @property
+    def volt_bias(self) -> float:
+        return self.__volt_bias
+
+    @volt_bias.setter
+    def volt_bias(self, volt_bias: float) -> None:
+        self.__volt_bias = volt_bias
+        self.__scale = self.__DIGITAL_MAX / (self.__VOLT_REF + volt_bias)
+
     def __write_data(self, channel: int, int_data: int) -> None:
-        spi_write([channel, int_data >> 8, int_data & 0xFF])
+        self.spi.write([channel, int_data >> 8, int_data & 0xFF])
 
     def __is_invalid_param(self, voltage: float, channel: int) -> bool | str:
         if not (0 <= voltage <= self.__VOLT_REF):
             return "Invalid Voltage Output"
-        if channel not in [self.CH_A, self.CH_B]:
+        if channel not in self.__codes:
             return "Invalid Channel Iutput"
         return False
 
-    def output_volt(self, voltage: float, channel: int = CH_A) -> None:
+    def output_volt(self, voltage: float, channel: int = CH_A, force: bool = False) -> None:
         """
         ### Output the specified voltage to the specified channel.
         ---
         Note:
         - The output voltage must be between `0` and `5` volts !
         - The channel value must be an integer between `CH_A` and `CH_B` !
+        - The write is skipped if the channel already holds the same code,
+        unless `force` is set.
         """
 
         if err := self.__is_invalid_param(voltage, channel):
             termination(ValueError(err))
 
-        ref_volt = self.__VOLT_REF + self.volt_bias
-        digital_val = (voltage / ref_volt) * self.__DIGITAL_MAX
-        self.__write_data(channel, int(digital_val))
+        self.output_code(int(voltage * self.__scale), channel, force)
+
+    def output_code(self, code: int, channel: int = CH_A, force: bool = False) -> None:
+        """
+        ### Output a code from `volts_to_codes` to the specified channel.
+        ---
+        Note:
+        - The code is not checked; see `output_volt` for the rest.
+        """
+
+        if channel not in self.__codes:
+            termination(ValueError("Invalid Channel Iutput"))
+
+        code = int(code)
+        if not force and self.__codes[channel] == code:
+            self.skipped_writes += 1
+            return
+
+        self.__write_data(channel, code)
+        self.__codes[channel] = code
+        wait_us(SETTLE_US, "settle")
+
+    def volts_to_codes(self, voltages) -> np.ndarray:
+        """
+        ### Convert a voltage waveform to DAC codes at once.
+        ---
+        Note:
+        - Every voltage must be between `0` and `5` volts !
+        - The codes equal those `output_volt` would write.
+        """
+
+        voltages = np.asarray(voltages, dtype=float)
+        if np.any((voltages < 0) | (voltages > self.__VOLT_REF)):
+            termination(ValueError("Invalid Voltage Output"))
+        return (voltages * self.__scale).astype(np.uint16)
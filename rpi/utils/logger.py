@@ -0,0 +1,195 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+
+import json
+from csv import writer as write
+from pathlib import Path
+from time import monotonic_ns
+
+import numpy as np
+
+# Binary record file: one header line, then little-endian float64 records
+BIN_MAGIC = b"#PRPCE "
+BIN_DTYPE = "<f8"
+
+
+class DataLogger:
+    """
+    ## Buffered logger that keeps its file open between samples.
+
+    Rows are kept in memory and written when `buffer_rows` rows are pending,
+    when `flush_interval` seconds of `clock` (nanoseconds, e.g. the backend's
+    `utils.wrapper.now_ns`) have passed since the last write, and on
+    `close()`. With `max_bytes` the file is rotated to `<stem>_001<suffix>`,
+    `<stem>_002<suffix>`, ... once it grows past that size; `rotate()` starts
+    a new file on demand (e.g. once per run).
+
+    `binary=True` writes float64 records instead of CSV text, see `to_csv`.
+    """
+
+    def __init__(
+        self,
+        file: str,
+        header: list[str],
+        formats: list[str] | None = None,
+        buffer_rows: int = 60,
+        flush_interval: float = 10.0,
+        max_bytes: int | None = None,
+        binary: bool = False,
+        clock=monotonic_ns,
+    ) -> None:
+        self.header = list(header)
+        self.formats = list(formats) if formats else ["g"] * len(self.header)
+        self.buffer_rows = buffer_rows
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.binary = binary
+        self.__clock = clock
+
+        self.__base = Path(file)
+        self.__index = 0
+        self.__rows: list[tuple] = []
+        self.__file = None
+        self.__writer = None
+        self.__last_flush = self.__clock()
+        self.__open(self.__base)
+
+    @property
+    def path(self) -> Path:
+        return Path(self.__file.name)
+
+    def __open(self, path: Path) -> None:
+        if self.binary:
+            self.__file = open(path, mode="wb")  # noqa: SIM115
+            self.__file.write(BIN_MAGIC + json.dumps(self.header).encode() + b"\n")
+        else:
+            self.__file = open(path, mode="w", encoding="utf-8", newline="")  # noqa: SIM115
+            self.__writer = write(self.__file)
+            self.__writer.writerow(self.header)
+        self.__file.flush()
+
+    def log(self, *values: float) -> None:
+        """
+        ## Queue one row, flushing if a threshold is reached.
+        """
+        self.__rows.append(values)
+        self.__check_flush()
+
+    def log_many(self, rows) -> None:
+        """
+        ## Queue several rows, e.g. a `Telemetry.drain()` view, flushing if needed.
+        """
+        if len(rows):
+            self.__rows.extend(rows.tolist() if isinstance(rows, np.ndarray) else rows)
+            self.__check_flush()
+
+    def __check_flush(self) -> None:
+        if (
+            len(self.__rows) >= self.buffer_rows
+            or self.__clock() - self.__last_flush >= self.flush_interval * 1e9
+        ):
+            self.flush()
+
+    def __write_pending(self) -> None:
+        if self.__rows:
+            if self.binary:
+                records = np.asarray(self.__rows, dtype=BIN_DTYPE)
+                self.__file.write(records.tobytes())
+            else:
+                self.__writer.writerows(
+                    [
+                        [format(v, f) for v, f in zip(row, self.formats, strict=True)]
+                        for row in self.__rows
+                    ]
+                )
+            self.__rows.clear()
+            self.__file.flush()
+        self.__last_flush = self.__clock()
+
+    def flush(self) -> None:
+        """
+        ## Write the pending rows to the file, rotating it if it grew too large.
+        """
+        self.__write_pending()
+        if self.max_bytes is not None and self.__file.tell() >= self.max_bytes:
+            self.rotate()
+
+    def rotate(self) -> None:
+        """
+        ## Close the current file and continue in `<stem>_<n><suffix>`.
+        """
+        self.__write_pending()
+        self.__file.close()
+        self.__index += 1
+        base = self.__base
+        self.__open(base.with_name(f"{base.stem}_{self.__index:03d}{base.suffix}"))
+
+    def close(self) -> None:
+        """
+        ## Flush the pending rows and close the file.
+        """
+        if self.__file is not None and not self.__file.closed:
+            self.__write_pending()
+            self.__file.close()
+
+    def __enter__(self) -> "DataLogger":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def read_binary(file: str) -> tuple[list[str], np.ndarray]:
+    """
+    ## Read a binary record file written by `DataLogger(binary=True)`.
+
+    #### Return value:
+    (header, records) where records has shape (n_rows, len(header))
+    """
+    with open(file, mode="rb") as binfile:
+        first = binfile.readline()
+        if not first.startswith(BIN_MAGIC):
+            raise ValueError(f"{file} is not a DataLogger record file")
+        header = json.loads(first[len(BIN_MAGIC) :])
+        records = np.frombuffer(binfile.read(), dtype=BIN_DTYPE)
+    return header, records.reshape(-1, len(header))
+
+
+def to_csv(file: str, csv_file: str | None = None, formats: list[str] | None = None) -> str:
+    """
+    ## Convert a binary record file to the CSV schema read by `fit_model`.
+
+    #### Return value:
+    Path of the CSV file (defaults to the record file with a `.csv` suffix)
+    """
+    header, records = read_binary(file)
+    formats = formats or ["g"] * len(header)
+    csv_file = csv_file or str(Path(file).with_suffix(".csv"))
+    with open(csv_file, mode="w", encoding="utf-8", newline="") as csvfile:
+        writer = write(csvfile)
+        writer.writerow(header)
+        writer.writerows(
+            [format(v, f) for v, f in zip(row, formats, strict=True)]
+            for row in records.tolist()
+        )
+    return csv_file
+
+
+if __name__ == "__main__":
+    import sys
+
+    for name in sys.argv[1:]:
+        print(to_csv(name))
@@ -0,0 +1,111 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+
+from math import sqrt
+from time import monotonic_ns, sleep
+
+
+class PeriodicScheduler:
+    """
+    ## Fixed-rate ticks on absolute deadlines `start + k * period`.
+
+    `wait()` replaces `sleep(period)` at the end of a loop body: it sleeps
+    until the next deadline however long the body took, so the sample time
+    does not drift. A body that runs past its deadline is an overrun; if it
+    runs past whole periods those ticks are counted as missed and skipped.
+    """
+
+    def __init__(self, period: float, clock=monotonic_ns, sleeper=sleep) -> None:
+        # `clock` returns nanoseconds and `sleeper` takes seconds, so a simulated
+        # backend can run the same timeline on virtual time
+        self.__clock = clock
+        self.__sleep = sleeper
+        self.period = period
+        self.__period_ns = int(round(period * 1e9))
+        self.start()
+
+    def start(self) -> None:
+        """
+        ## (Re)start the timeline at tick 0 = now and clear the statistics.
+        """
+        self.__start_ns = self.__clock()
+        self.__tick = 0
+        self.overruns = 0
+        self.missed = 0
+
+        # Lateness of each wake-up after its deadline (Welford running stats)
+        self.__count = 0
+        self.__mean = 0.0
+        self.__m2 = 0.0
+        self.__max = 0.0
+
+    @property
+    def tick(self) -> int:
+        return self.__tick
+
+    def elapsed(self) -> float:
+        """
+        ## Seconds since the start of the timeline.
+        """
+        return (self.__clock() - self.__start_ns) / 1e9
+
+    def wait(self) -> float:
+        """
+        ## Sleep until the next deadline.
+
+        #### Return value:
+        Elapsed time of the deadline just reached, in seconds
+        """
+        self.__tick += 1
+        deadline = self.__start_ns + self.__tick * self.__period_ns
+        now = self.__clock()
+
+        if now >= deadline:
+            self.overruns += 1
+            skipped = (now - deadline) // self.__period_ns
+            if skipped:
+                self.missed += skipped
+                self.__tick += skipped
+                deadline += skipped * self.__period_ns
+        else:
+            self.__sleep((deadline - now) / 1e9)
+            now = self.__clock()
+
+        self.__record((now - deadline) / 1e9)
+        return (deadline - self.__start_ns) / 1e9
+
+    def __record(self, late: float) -> None:
+        self.__count += 1
+        delta = late - self.__mean
+        self.__mean += delta / self.__count
+        self.__m2 += delta * (late - self.__mean)
+        self.__max = max(self.__max, late)
+
+    @property
+    def jitter(self) -> dict[str, float]:
+        """
+        ## Statistics of the wake-up lateness, in seconds.
+        """
+        std = sqrt(self.__m2 / self.__count) if self.__count else 0.0
+        return {"mean": self.__mean, "std": std, "max": self.__max}
+
+    def report(self) -> str:
+        jitter = self.jitter
+        return (
+            f"Ticks: {self.__tick}\tOverruns: {self.overruns}\tMissed: {self.missed}\t"
+            f"Jitter mean/std/max: {jitter['mean'] * 1e3:.3f}/"
+            f"{jitter['std'] * 1e3:.3f}/{jitter['max'] * 1e3:.3f} ms"
+        )
@@ -0,0 +1,243 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+from collections import deque
+from math import exp, floor
+
+import numpy as np
+
+from utils.adc import (
+    CMD_RDATA,
+    CMD_RDATAC,
+    CMD_RREG,
+    CMD_SDATAC,
+    CMD_WAKEUP,
+    CMD_WREG,
+    REG_MUX,
+    REG_STATUS,
+)
+from utils.backend import HIGH, LOW, Backend
+from utils.convert import REF
+from utils.wrapper import AD_CS_PIN, AD_DRDY_PIN, AD_RST_PIN, DA_CS_PIN
+
+# MUX settings that select AIN0 (single-ended and differential)
+PRESSURE_MUX = ((0 << 4) | (1 << 3), (0 << 4) | 1)
+
+# Self-calibration after a reset, during which DRDY stays high
+SELF_CAL_NS = 800_000
+
+
+class SimulatedPlant(Backend):
+    """
+    ## Backend emulating the AD/DA board wired to an FOPDT pressure process.
+
+    DAC channel A drives the valve, an FOPDT model turns the valve opening
+    into pressure, and ADC input 0 reads it back with Gaussian noise. Time is
+    virtual: `sleep` advances the clock instantly, so loops run as fast as the
+    host allows, while SPI transfers take their bus time. The MV fed to the
+    model is sampled once per second, like the on-line model in `control.py`,
+    and only the seconds still inside the dead time are kept.
+
+    As on the chip, RDATA returns the data register, which a conversion fills
+    as DRDY falls, not the input selected since: the pipelined
+    `ADS1256.scan` reads each channel while the next one converts.
+    """
+
+    def __init__(
+        self,
+        model_params: tuple[float, float, float] = (-0.347, 14.720, 3.865),
+        initial_pressure: float = 5.0,
+        initial_valve: float = 6.0,
+        noise: float = 0.0,
+        seed: int | None = None,
+        background_noise: int = 19925,
+        volt_bias: float = 0.165,
+    ) -> None:
+        self.initial_valve = initial_valve
+        self.noise = noise
+        self.background_noise = background_noise
+        self.volt_bias = volt_bias
+        self.__rng = np.random.default_rng(seed)
+
+        # Process
+        self.valve = initial_valve
+        self.pressure = initial_pressure
+        self.initial_pressure = initial_pressure
+        self.__gain, self.__tau, self.__dead_time = model_params
+        self.__model_time = 0.0
+
+        # MV of the seconds up to the current one, as FOPDTPredictor keeps it:
+        # the dead time never reaches further back than delay + 1 seconds
+        delay = int(self.__dead_time)
+        self.__mv = deque([0.0] * (delay + 2), maxlen=delay + 2)
+        self.__slot = 0
+
+        # Virtual clock, GPIO levels and SPI protocol state
+        self.__now_ns = 0
+        self.__calibrated_ns = 0
+        self.__levels = {AD_CS_PIN: HIGH, DA_CS_PIN: HIGH}
+        self.__registers = {REG_STATUS: 0x30, REG_MUX: 0x01}
+
+        # Input of the conversion in progress, and the data register that
+        # RDATA / RDATAC read: the last conversion completed at DRDY
+        self.__converting = self.__registers[REG_MUX]
+        self.__latched = [0, 0, 0]
+        self.__out: list[int] = []
+        self.__command: list[int] = []
+        self.__continuous = False
+        self.__dac_bytes: list[int] = []
+
+    ##### Process
+    def __advance(self) -> None:
+        """
+        ## Integrate the model up to the virtual clock.
+
+        The seconds from the last advance to now take the current valve
+        opening. The delayed MV is constant between `second + dead_time`
+        boundaries, so each piece is integrated exactly.
+        """
+        now = self.__now_ns / 1e9
+        mv = self.valve - self.initial_valve
+        history, first = self.__mv, self.__slot - len(self.__mv) + 1
+        history[-1] = mv
+
+        dead_time = self.__dead_time
+        start, x = self.__model_time, self.pressure - self.initial_pressure
+        for second in range(floor(start - dead_time), floor(now - dead_time) + 1):
+            end = min(now, second + 1 + dead_time)
+            if end <= start:
+                continue
+            u = mv if second >= self.__slot else history[second - first]
+            decay = exp(-(end - start) / self.__tau)
+            x = x * decay + self.__gain * u * (1.0 - decay)
+            start = end
+        if now > self.__model_time:
+            self.pressure = self.initial_pressure + x
+            self.__model_time = now
+
+        slot = int(now)
+        history.extend([mv] * min(slot - self.__slot, history.maxlen))
+        self.__slot = max(slot, self.__slot)
+
+    def __sample(self, mux: int) -> list[int]:
+        value = self.background_noise
+        if mux in PRESSURE_MUX:
+            self.__advance()
+            pressure = self.pressure + self.__rng.normal(0.0, self.noise)
+            value += int(pressure / REF["pressure"] * REF["digital signal"])
+        value = min(max(value, 0), 0x7FFFFF)
+        return [(value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF]
+
+    def __convert(self) -> None:
+        # A conversion completes as DRDY is seen low: its result replaces the
+        # data register, and the next one runs on the MUX selected now
+        self.__latched = self.__sample(self.__converting)
+        self.__converting = self.__registers[REG_MUX]
+
+    ##### ADS1256 / DAC8532 protocol
+    def __adc_byte(self, byte: int) -> None:
+        command = self.__command
+        command.append(byte)
+        head = command[0]
+        if head & 0xF0 == CMD_WREG:
+            # WREG, count - 1, data...
+            if len(command) < 2 or len(command) < command[1] + 3:
+                return
+            for offset, data in enumerate(command[2:]):
+                reg = (head & 0x0F) + offset
+                if reg == REG_STATUS:
+                    # The chip ID nibble is read-only
+                    data = (self.__registers[REG_STATUS] & 0xF0) | (data & 0x0F)
+                self.__registers[reg] = data
+        elif head & 0xF0 == CMD_RREG:
+            # RREG, count - 1
+            if len(command) < 2:
+                return
+            reg = head & 0x0F
+            self.__out += [self.__registers.get(reg + i, 0) for i in range(command[1] + 1)]
+        elif head == CMD_WAKEUP:
+            # SYNC + WAKEUP restart the conversion on the selected input
+            self.__converting = self.__registers[REG_MUX]
+        elif head == CMD_RDATA:
+            self.__out += self.__latched
+        elif head == CMD_RDATAC:
+            self.__continuous = True
+        elif head == CMD_SDATAC:
+            self.__continuous = False
+        command.clear()
+
+    def __dac_byte(self, byte: int) -> None:
+        self.__dac_bytes.append(byte)
+        if len(self.__dac_bytes) == 3:
+            channel, high, low = self.__dac_bytes
+            self.__dac_bytes.clear()
+            if channel == 0x30:
+                self.__advance()
+                volt = ((high << 8) | low) / 65535 * (REF["voltage"] + self.volt_bias)
+                self.valve = volt / REF["voltage"] * REF["valve"]
+
+    def __send(self, byte: int) -> int:
+        if self.__levels[AD_CS_PIN] == LOW:
+            # In RDATAC mode, dummy bytes clock out the latest conversion
+            if self.__continuous and not self.__out and byte in (0x00, 0xFF):
+                self.__out += self.__latched
+            # Bytes clocked while the chip has data pending are dummies
+            if self.__out:
+                return self.__out.pop(0)
+            self.__adc_byte(byte)
+        elif self.__levels[DA_CS_PIN] == LOW:
+            self.__dac_byte(byte)
+        return 0
+
+    ##### Backend
+    def setup(self, pin: int, direction: str, pull_up: bool = False) -> None:
+        self.__levels.setdefault(pin, HIGH if pull_up else LOW)
+
+    def output(self, pin: int, level: int) -> None:
+        if pin == AD_RST_PIN and level == HIGH and self.__levels.get(pin) == LOW:
+            self.__calibrated_ns = self.__now_ns + SELF_CAL_NS
+        self.__levels[pin] = level
+        if pin == AD_CS_PIN and level == HIGH:
+            self.__command.clear()
+        elif pin == DA_CS_PIN and level == HIGH:
+            self.__dac_bytes.clear()
+
+    def input(self, pin: int) -> int:
+        # Conversions are always ready, except during self-calibration
+        if pin == AD_DRDY_PIN:
+            if self.__now_ns < self.__calibrated_ns:
+                return HIGH
+            self.__convert()
+            return LOW
+        return self.__levels.get(pin, LOW)
+
+    def wait_for_falling_edge(self, pin: int, timeout_ms: int) -> None:
+        if pin == AD_DRDY_PIN:
+            self.__now_ns = max(self.__now_ns, self.__calibrated_ns)
+
+    def spi_xfer(self, data: list[int], delay_usecs: int = 0, speed_hz: int = 0) -> list[int]:
+        if speed_hz:
+            self.__now_ns += len(data) * 8 * 1_000_000_000 // speed_hz
+        self.__now_ns += delay_usecs * 1000
+        return [self.__send(byte) for byte in data]
+
+    def monotonic_ns(self) -> int:
+        return self.__now_ns
+
+    def sleep(self, seconds: float) -> None:
+        self.__now_ns += int(seconds * 1e9)
+
+    def delay_ns(self, nanoseconds: int) -> None:
+        self.__now_ns += nanoseconds
@@ -0,0 +1,98 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+
+import numpy as np
+
+# Fields of a `control.py` record, in the order of its log columns
+FIELDS = ("time", "mv", "pv", "prediction", "kp", "tau", "theta", "sp", "p", "i", "d")
+
+
+class Telemetry:
+    """
+    ## Fixed-memory ring buffer of control loop records, one float64 per field.
+
+    Record n is written twice, at `n % capacity` and `n % capacity + capacity`,
+    so the last `k <= capacity` records always form one contiguous slice and
+    `window` / `drain` return views into the buffer instead of copies. Memory
+    stays at `2 * capacity` records however long the loop runs.
+
+    A view of k records stays valid for `capacity - k` more appends; copy it
+    to keep it longer.
+    """
+
+    def __init__(self, fields=FIELDS, capacity: int = 3600) -> None:
+        self.dtype = np.dtype([(name, "f8") for name in fields])
+        self.capacity = capacity
+        self.__data = np.zeros(2 * capacity, dtype=self.dtype)
+        self.__count = 0
+        self.__drained = 0
+
+        # Records overwritten before `drain` returned them
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return min(self.__count, self.capacity)
+
+    @property
+    def count(self) -> int:
+        """
+        ## Records appended since the start, including overwritten ones.
+        """
+        return self.__count
+
+    def append(self, *values: float) -> None:
+        """
+        ## Add one record, with a value per field in order.
+        """
+        slot = self.__count % self.capacity
+        self.__data[slot] = values
+        self.__data[slot + self.capacity] = values
+        self.__count += 1
+
+    def window(self, n: int | None = None) -> np.ndarray:
+        """
+        ## View of the last `n` records (default: all kept), oldest first.
+
+        A field of the view, e.g. `window(60)["pv"]`, is a view as well.
+        """
+        size = len(self) if n is None else min(n, len(self))
+        end = (self.__count - 1) % self.capacity + self.capacity + 1
+        return self.__data[end - size : end]
+
+    @property
+    def latest(self) -> np.void:
+        return self.window(1)[0]
+
+    @property
+    def pending(self) -> int:
+        """
+        ## Records appended since the last `drain`.
+        """
+        return self.__count - self.__drained
+
+    def drain(self) -> np.ndarray:
+        """
+        ## View of the records appended since the last `drain`.
+
+        If more than `capacity` were appended, the oldest are lost and counted
+        in `dropped`.
+        """
+        pending = self.pending
+        if pending > self.capacity:
+            self.dropped += pending - self.capacity
+            pending = self.capacity
+        self.__drained = self.__count
+        return self.window(pending)
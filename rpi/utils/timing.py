@@ -0,0 +1,84 @@
+# Copyright (C) 2024 Phoínix Chen
+#
+# This file is part of PRPCE.
+#
+# PRPCE is free software: you can redistribute it and/or modify it under the terms of
+# the GNU Lesser General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+#
+# PRPCE is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+# without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR
+# PURPOSE. See the GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License along with
+# PRPCE. If not, see <https://www.gnu.org/licenses/>.
+
+
+from utils.wrapper import get_backend
+
+
+class DelayTiming:
+    """
+    ## Requested and measured durations of one named delay.
+    """
+
+    __slots__ = ("requested_ns", "count", "total_ns", "max_ns")
+
+    def __init__(self, requested_ns: int) -> None:
+        self.requested_ns = requested_ns
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, elapsed_ns: int) -> None:
+        self.count += 1
+        self.total_ns += elapsed_ns
+        self.max_ns = max(self.max_ns, elapsed_ns)
+
+    @property
+    def mean_ns(self) -> float:
+        return self.total_ns / self.count if self.count else 0.0
+
+
+# Measured delays by label
+timings: dict[str, DelayTiming] = {}
+
+
+def wait_us(microsecond: float, label: str | None = None) -> None:
+    """
+    ## Wait `microsecond` us: sleep for the bulk, spin on the clock for the tail.
+
+    With a `label`, the real duration of the wait is added to `timings`.
+    """
+    backend = get_backend()
+    ns = int(microsecond * 1000)
+    if label is None:
+        backend.delay_ns(ns)
+        return
+
+    start = backend.monotonic_ns()
+    backend.delay_ns(ns)
+    elapsed = backend.monotonic_ns() - start
+    if label not in timings:
+        timings[label] = DelayTiming(ns)
+    timings[label].add(elapsed)
+
+
+def wait_ms(millisecond: float, label: str | None = None) -> None:
+    """
+    ## Wait `millisecond` ms, see `wait_us`.
+    """
+    wait_us(millisecond * 1000, label)
+
+
+def report() -> str:
+    """
+    ## One line per labelled delay: requested, mean and max duration in us.
+    """
+    lines = ["Delay\tRequested\tCount\tMean\tMax (us)"]
+    for label, timing in timings.items():
+        lines.append(
+            f"{label}\t{timing.requested_ns / 1e3:.1f}\t{timing.count}\t"
+            f"{timing.mean_ns / 1e3:.1f}\t{timing.max_ns / 1e3:.1f}"
+        )
+    return "\n".join(lines)
@@ -14,44 +14,50 @@
 # PRPCE. If not, see <https://www.gnu.org/licenses/>.
 
 
-from time import sleep
-from typing import Callable, List, NoReturn
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import NoReturn
 
-import RPi.GPIO as GPIO
-import spidev
+from utils.backend import HIGH, IN, LOW, OUT, Backend, from_env
 
+##### Backend
+# Chosen on first use (see `utils.backend.from_env`), so importing this module
+# does not touch the hardware.
+_backend: Backend | None = None
 
-def delay(millisecond: int):
-    sleep(millisecond // 1000)
 
+def get_backend() -> Backend:
+    global _backend
+    if _backend is None:
+        _backend = from_env()
+    return _backend
 
-#####   GPIO Wrapper
-GPIO.setwarnings(False)
 
+def set_backend(backend: Backend) -> None:
+    global _backend
+    _backend = backend
 
-def gpo_low(pin: int) -> None:
-    GPIO.output(pin, GPIO.LOW)
 
+def now_ns() -> int:
+    return get_backend().monotonic_ns()
 
-def gpo_high(pin: int) -> None:
-    GPIO.output(pin, GPIO.HIGH)
 
+def pause(seconds: float) -> None:
+    get_backend().sleep(seconds)
 
-def chip_select(cs_pin: int):
-    def decorator(func: Callable):
-        def wrapper(*args, **kwargs):
-            gpo_low(cs_pin)  # CS/SS Low
-            result = func(*args, **kwargs)
-            gpo_high(cs_pin)  # CS/SS High
-            return result
 
-        return wrapper
+#####   GPIO Wrapper
+def gpo_low(pin: int) -> None:
+    get_backend().output(pin, LOW)
+
 
-    return decorator
+def gpo_high(pin: int) -> None:
+    get_backend().output(pin, HIGH)
 
 
 def cleanup() -> None:
-    GPIO.cleanup()
+    if _backend is not None:
+        _backend.cleanup()
     print("\nSafely kill processes")
 
 
@@ -61,47 +67,190 @@ def termination(error: Exception) -> NoReturn:
 
 
 # PIN
-GPIO.setmode(GPIO.BCM)
 AD_DRDY_PIN = 17
 AD_RST_PIN = 18
 AD_CS_PIN = 22
 DA_CS_PIN = 23
 
+# SPI clock of each chip, in Hz
+AD_SPI_HZ = 1_920_000  # ADS1256: SCLK period >= 4 tCLKIN (521 ns)
+DA_SPI_HZ = 10_000_000  # DAC8532: 30 MHz max, with margin for the board wiring
+
 
 def adc_pin_init() -> None | NoReturn:
     try:
-        GPIO.setup(AD_CS_PIN, GPIO.OUT)
-        GPIO.setup(AD_DRDY_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-        GPIO.setup(AD_RST_PIN, GPIO.OUT)
+        backend = get_backend()
+        backend.setup(AD_CS_PIN, OUT)
+        backend.setup(AD_DRDY_PIN, IN, pull_up=True)
+        backend.setup(AD_RST_PIN, OUT)
     except Exception as error:
         termination(error)
 
 
 def dac_pin_init() -> None | NoReturn:
     try:
-        GPIO.setup(DA_CS_PIN, GPIO.OUT)
+        get_backend().setup(DA_CS_PIN, OUT)
     except Exception as error:
         termination(error)
 
 
-def wait_data_ready() -> None | NoReturn:
-    for _ in range(400000):
-        if GPIO.input(AD_DRDY_PIN) == 0:
-            return
-    termination(RuntimeError("Time Out"))
+class DataReadyWaiter:
+    """
+    ## Wait for the active-low DRDY pin with a real timeout.
+
+    `mode="edge"` blocks in the backend's edge wait until DRDY falls, so no
+    core is kept busy; if edge detection cannot be used it falls back to
+    `mode="poll"`, which checks the pin every `poll_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        pin: int,
+        timeout_ms: int = 1000,
+        mode: str = "edge",
+        poll_interval: float = 50e-6,
+    ) -> None:
+        self.pin = pin
+        self.timeout_ms = timeout_ms
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def stats(self) -> dict[str, float]:
+        mean = self.wait_time / self.waits if self.waits else 0.0
+        return {
+            "waits": self.waits,
+            "timeouts": self.timeouts,
+            "mean_wait": mean,
+            "max_wait": self.max_wait,
+        }
+
+    def __ready(self) -> bool:
+        return get_backend().input(self.pin) == LOW
+
+    def __wait_edge(self) -> bool:
+        try:
+            get_backend().wait_for_falling_edge(self.pin, self.timeout_ms)
+        except RuntimeError:
+            # Edge detection already in use on this pin
+            self.mode = "poll"
+            return self.__wait_poll()
+        # The edge may have fallen between the first check and arming the wait
+        return self.__ready()
+
+    def __wait_poll(self) -> bool:
+        deadline = now_ns() + self.timeout_ms * 1_000_000
+        while not self.__ready():
+            if now_ns() >= deadline:
+                return False
+            pause(self.poll_interval)
+        return True
+
+    def wait_busy(self, timeout_us: int = 1000) -> None | NoReturn:
+        """
+        ## Poll until DRDY goes high, e.g. as a reset starts self-calibration.
+
+        Waiting for the high level first keeps a DRDY still low from an earlier
+        conversion from being taken for the end of what follows.
+        """
+        deadline = now_ns() + timeout_us * 1000
+        while self.__ready():
+            if now_ns() >= deadline:
+                termination(RuntimeError("DRDY did not go high"))
+            pause(self.poll_interval)
+
+    def __call__(self) -> None | NoReturn:
+        start = now_ns()
+        ready = self.__ready() or (
+            self.__wait_edge() if self.mode == "edge" else self.__wait_poll()
+        )
+
+        elapsed = (now_ns() - start) / 1e9
+        self.waits += 1
+        self.wait_time += elapsed
+        self.max_wait = max(self.max_wait, elapsed)
+        if not ready:
+            self.timeouts += 1
+            termination(RuntimeError("Time Out"))
+
+
+wait_data_ready = DataReadyWaiter(AD_DRDY_PIN)
 
 
 ##### SPI Wrapper
-spi = spidev.SpiDev()
-bus, device = 0, 0
-spi.open(bus, device)
-spi.max_speed_hz = 20000
-spi.mode = 0b01
-
-
-def spi_write(reg: List[bytes]) -> None:
-    spi.writebytes(reg)
-
-
-def spi_read(n_bytes: int) -> List[bytes]:
-    return spi.readbytes(n_bytes)
+class SPIDevice:
+    """
+    ## One chip on the shared SPI bus: its chip-select pin, clock and traffic.
+
+    Every transfer is a single xfer2 at the device's own `speed_hz`, so each
+    chip runs at its datasheet maximum whatever the bus default is.
+    `transaction()` holds CS low over any number of `xfer` calls; `write` and
+    `query` are one-transaction shortcuts. Transactions, transfers, bytes and
+    the time CS was held low are counted in `stats`.
+    """
+
+    def __init__(self, cs_pin: int, speed_hz: int) -> None:
+        self.cs_pin = cs_pin
+        self.speed_hz = speed_hz
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.transactions = 0
+        self.transfers = 0
+        self.bytes = 0
+        self.time_ns = 0
+
+    @property
+    def stats(self) -> dict[str, float]:
+        mean = self.time_ns / self.transactions / 1e3 if self.transactions else 0.0
+        return {
+            "transactions": self.transactions,
+            "transfers": self.transfers,
+            "bytes": self.bytes,
+            "time": self.time_ns / 1e9,
+            "mean_transaction_us": mean,
+        }
+
+    @contextmanager
+    def transaction(self) -> Generator["SPIDevice", None, None]:
+        start = now_ns()
+        gpo_low(self.cs_pin)
+        try:
+            yield self
+        finally:
+            gpo_high(self.cs_pin)
+            self.transactions += 1
+            self.time_ns += now_ns() - start
+
+    def xfer(self, data: list[int], delay_usecs: int = 0) -> list[int]:
+        """
+        ## One transfer inside a `transaction()`.
+        """
+        self.transfers += 1
+        self.bytes += len(data)
+        return get_backend().spi_xfer(data, delay_usecs, self.speed_hz)
+
+    def write(self, data: list[int], delay_usecs: int = 0) -> None:
+        with self.transaction():
+            self.xfer(data, delay_usecs)
+
+    def query(self, command: list[int], n_bytes: int, delay_usecs: int = 0) -> list[int]:
+        """
+        ## Send `command` and read `n_bytes` back in one transaction.
+
+        Without `delay_usecs` the command and the dummy bytes clocking the
+        reply out go in a single xfer2. A chip that needs a gap before its
+        reply (e.g. the ADS1256 t6) gets a second transfer after the delay.
+        """
+        with self.transaction():
+            if not delay_usecs:
+                return self.xfer([*command, *[0xFF] * n_bytes])[len(command) :]
+            self.xfer(command, delay_usecs)
+            return self.xfer([0xFF] * n_bytes)